@@ -3,6 +3,9 @@ from supabase import create_client
 import os
 from utils.tools import set_background
 from utils.auth import check_auth
+from utils.model_manager import load_model
+from utils.profiling import profiler
+from utils.session_budget import get_session_budget
 
 # Initialize Supabase client
 supabase = create_client(
@@ -28,6 +31,115 @@ def approve_reviewer(user_id):
         st.error(f"Error approving reviewer: {str(e)}")
         return None
 
+def model_management_section():
+    """Load, shadow-test and promote a candidate screening model without a restart"""
+    st.write("### Screening Model")
+    manager = load_model()
+    try:
+        status = manager.status()
+    except Exception as e:
+        st.error(f"Error fetching model status: {str(e)}")
+        return
+
+    st.write(f"**Live model:** {status['live_path']}")
+    if status['candidate_path'] is None:
+        candidate_path = st.text_input("Candidate model path", placeholder="./model/candidate.pt")
+        if st.button("Load candidate") and candidate_path:
+            try:
+                with st.spinner("Loading candidate model..."):
+                    manager.load_candidate(candidate_path)
+                st.rerun()
+            except Exception as e:
+                st.error(f"Error loading candidate model: {str(e)}")
+        return
+
+    st.write(f"**Candidate model:** {status['candidate_path']}")
+    fraction = st.slider("Shadow traffic fraction", 0.0, 1.0, float(status['shadow_fraction']), 0.05)
+    if fraction != status['shadow_fraction']:
+        manager.set_shadow_fraction(fraction)
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Shadow comparisons", status['shadow_compared'])
+    col2.metric("Agreement", "-" if status['shadow_agreement'] is None else f"{status['shadow_agreement']:.1%}")
+    col3.metric("Skipped (busy)", status['shadow_skipped'])
+
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("Promote candidate", type="primary", use_container_width=True):
+            try:
+                manager.promote()
+                st.success("Candidate model is now live.")
+                st.rerun()
+            except Exception as e:
+                st.error(f"Error promoting candidate model: {str(e)}")
+    with col2:
+        if st.button("Discard candidate", use_container_width=True):
+            manager.discard_candidate()
+            st.rerun()
+
+def profiling_section():
+    """Start on-demand sampling profiles of this app process and download the results"""
+    st.write("### Profiling")
+    status = profiler.status()
+    if status["active"]:
+        remaining = (
+            f"{status['seconds_left']:.0f}s left" if status["seconds_left"] is not None
+            else f"{status['requests_left']} requests left"
+        )
+        st.info(f"Profiling: {status['samples']} samples, {status['requests']} requests tracked, {remaining}.")
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("Refresh", use_container_width=True):
+                st.rerun()
+        with col2:
+            if st.button("Stop profiling", use_container_width=True):
+                profiler.stop()
+                st.rerun()
+    else:
+        col1, col2 = st.columns(2)
+        with col1:
+            mode = st.radio("Profile for", options=["seconds", "requests"], format_func=lambda x: "N seconds" if x == "seconds" else "Next N requests")
+        with col2:
+            amount = st.number_input("N", min_value=1, max_value=600, value=30)
+        if st.button("Start profiling"):
+            profiler.start(**{mode: int(amount)})
+            st.rerun()
+
+    for i, capture in enumerate(profiler.captures):
+        with st.expander(f"Capture {capture['started']:%Y-%m-%d %H:%M:%S} ({capture['samples']} samples, {capture['requests']} requests)"):
+            st.code(capture["summary"])
+            stamp = f"{capture['started']:%Y%m%d_%H%M%S}"
+            col1, col2 = st.columns(2)
+            with col1:
+                st.download_button("Download flamegraph stacks", capture["folded"], file_name=f"profile_{stamp}.folded", key=f"folded_{i}")
+            with col2:
+                st.download_button("Download summary", capture["summary"], file_name=f"profile_{stamp}.txt", key=f"summary_{i}")
+
+def session_memory_section():
+    """Show this process's resident memory and the screening images each session holds"""
+    st.write("### Session Memory")
+    metrics = get_session_budget().metrics()
+    mb = 1024 * 1024
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Process Memory", f"{metrics['rss'] / mb:.0f} MB" if metrics["rss"] is not None else "n/a")
+    col2.metric("Held by Sessions", f"{metrics['tracked'] / mb:.1f} MB", help=f"Budget: {metrics['budget'] / mb:.0f} MB")
+    col3.metric("Evicted Images", metrics["evictions"], help=f"{metrics['releases']} had their decoded pixels dropped")
+    col4.metric("Idle Sessions Reaped", metrics["reaped"])
+    if metrics["sessions"]:
+        st.dataframe(
+            [{**session, "bytes": session["bytes"] / mb} for session in metrics["sessions"]],
+            use_container_width=True,
+            column_config={
+                "session": "Session",
+                "artifacts": "Images",
+                "bytes": st.column_config.NumberColumn("Held (MB)", format="%.2f"),
+                "idle_seconds": "Idle (s)",
+            },
+        )
+    if st.button("Reap idle sessions now"):
+        get_session_budget().reap()
+        st.rerun()
+
 def admin_page():
     st.set_page_config(
         page_title="Admin Dashboard",
@@ -47,11 +159,10 @@ def admin_page():
 
     # Fetch and display pending reviewers
     pending_reviewers = fetch_pending_reviewers()
+    st.write("### Pending Reviewers")
     if not pending_reviewers:
         st.info("No pending reviewers found.")
-        return
 
-    st.write("### Pending Reviewers")
     for reviewer in pending_reviewers:
         with st.container():
             st.write(f"**Username:** {reviewer['username']}")
@@ -61,5 +172,14 @@ def admin_page():
                 st.success(f"Approved {reviewer['username']}!")
                 st.rerun()
 
+    st.divider()
+    model_management_section()
+
+    st.divider()
+    profiling_section()
+
+    st.divider()
+    session_memory_section()
+
 if __name__ == "__main__":
     admin_page()
\ No newline at end of file
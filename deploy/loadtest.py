@@ -0,0 +1,60 @@
+"""Concurrent load test against the shared inference server.
+
+Simulates many workers screening at once and reports the server's throughput
+and latency percentiles. Requests go straight to /classify, so nginx and the
+Streamlit workers are not part of the measurement:
+
+    python deploy/loadtest.py --url http://127.0.0.1:8600 --image sample.jpg --concurrency 30 --requests 300
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from utils.inference_client import RemoteModel
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the shared inference server")
+    parser.add_argument("--url", default=os.getenv("INFERENCE_URL", "http://127.0.0.1:8600"))
+    parser.add_argument("--image", required=True)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=100)
+    args = parser.parse_args()
+
+    image = Image.open(args.image).convert("RGB")
+    with open(args.image, "rb") as f:
+        data = f.read()
+    clients = [RemoteModel(args.url) for _ in range(args.concurrency)]
+
+    def run(i):
+        start = time.perf_counter()
+        try:
+            clients[i % args.concurrency].classify(image, data=data)
+            ok = True
+        except Exception:
+            ok = False
+        return time.perf_counter() - start, ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(run, range(args.requests)))
+    elapsed = time.perf_counter() - start
+
+    latencies = [latency for latency, ok in results if ok]
+    failures = len(results) - len(latencies)
+    print(f"requests:   {len(results)} ({failures} failed)")
+    print(f"throughput: {len(latencies) / elapsed:.2f} images/s")
+    if latencies:
+        for q in (0.5, 0.95, 0.99):
+            print(f"p{int(q * 100):<9} {percentile(latencies, q) * 1000:.0f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+#!/usr/bin/env bash
+# Start one shared inference process and N Streamlit workers that use it.
+#
+#   deploy/run_workers.sh [workers] [first_port]
+#
+# Workers listen on first_port .. first_port+workers-1 (default 8501..8504),
+# matching the upstream block in deploy/nginx.conf.
+set -euo pipefail
+
+cd "$(dirname "$0")/.."
+
+WORKERS="${1:-4}"
+FIRST_PORT="${2:-8501}"
+INFERENCE_PORT="${INFERENCE_PORT:-8600}"
+export INFERENCE_URL="http://127.0.0.1:${INFERENCE_PORT}"
+
+pids=()
+trap 'kill "${pids[@]}" 2>/dev/null' EXIT INT TERM
+
+python inference_server.py --port "$INFERENCE_PORT" &
+pids+=($!)
+
+until curl -sf "$INFERENCE_URL/health" >/dev/null; do
+    sleep 1
+done
+
+for ((i = 0; i < WORKERS; i++)); do
+    streamlit run home.py \
+        --server.headless true \
+        --server.address 127.0.0.1 \
+        --server.port $((FIRST_PORT + i)) &
+    pids+=($!)
+done
+
+wait
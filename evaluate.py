@@ -0,0 +1,190 @@
+"""Offline evaluation of a screening model against a labelled image folder.
+
+Images are expected under one sub-directory per class named as in
+model/labels.txt, e.g. holdout/Type_1/*.jpg. Decoding runs in a process pool
+and inference in batches, with a bounded number of images in flight so
+memory stays flat however large the set is.
+
+    python evaluate.py holdout/ --model model/best.pt --batch-size 32 --json report.json
+"""
+import argparse
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import cv2
+import numpy as np
+from utils.tools import load_yolo
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png"}
+
+def load_labels(labels_path="./model/labels.txt"):
+    """Read class names from a labels file of `<index> <name>` lines"""
+    labels = {}
+    with open(labels_path) as f:
+        for line in f:
+            if line.strip():
+                index, name = line.split(maxsplit=1)
+                labels[int(index)] = name.strip()
+    return [labels[i] for i in sorted(labels)]
+
+def iter_labelled_images(root, class_names):
+    """Yield (path, class index) for every image under the per-class directories"""
+    for class_idx, class_name in enumerate(class_names):
+        class_dir = os.path.join(root, class_name)
+        if not os.path.isdir(class_dir):
+            continue
+        for dirpath, _, filenames in os.walk(class_dir):
+            for filename in sorted(filenames):
+                if os.path.splitext(filename)[1].lower() in IMAGE_EXTENSIONS:
+                    yield os.path.join(dirpath, filename), class_idx
+
+def decode_image(path, imgsz):
+    """Decode an image to BGR, shrinking its short side to imgsz to cut transfer cost"""
+    image = cv2.imread(path, cv2.IMREAD_COLOR)
+    if image is None:
+        return None
+    height, width = image.shape[:2]
+    scale = imgsz / min(height, width)
+    if scale < 1:
+        image = cv2.resize(image, (round(width * scale), round(height * scale)), interpolation=cv2.INTER_AREA)
+    return image
+
+def iter_decoded(items, workers, imgsz, max_in_flight):
+    """Decode images in a process pool, yielding (path, label, image) in input order"""
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for path, label in items:
+            pending.append((path, label, pool.submit(decode_image, path, imgsz)))
+            if len(pending) >= max_in_flight:
+                path, label, future = pending.popleft()
+                yield path, label, future.result()
+        while pending:
+            path, label, future = pending.popleft()
+            yield path, label, future.result()
+
+def compute_report(confusion, confidences, correct, class_names, threshold, bins=10):
+    """Summarise the confusion matrix and confidence calibration"""
+    total = int(confusion.sum())
+    per_class = {}
+    for i, name in enumerate(class_names):
+        tp = confusion[i, i]
+        predicted = confusion[:, i].sum()
+        actual = confusion[i, :].sum()
+        precision = tp / predicted if predicted else 0.0
+        recall = tp / actual if actual else 0.0
+        f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+        per_class[name] = {"precision": float(precision), "recall": float(recall), "f1": float(f1), "support": int(actual)}
+
+    calibration = []
+    ece = 0.0
+    edges = np.linspace(0, 1, bins + 1)
+    for low, high in zip(edges[:-1], edges[1:]):
+        mask = (confidences > low) & (confidences <= high)
+        count = int(mask.sum())
+        if not count:
+            continue
+        mean_conf = float(confidences[mask].mean())
+        accuracy = float(correct[mask].mean())
+        ece += count / total * abs(mean_conf - accuracy)
+        calibration.append({"bin": f"{low:.1f}-{high:.1f}", "count": count, "confidence": mean_conf, "accuracy": accuracy})
+
+    escalated = confidences < threshold
+    return {
+        "images": total,
+        "accuracy": float(correct.mean()) if total else 0.0,
+        "confusion_matrix": confusion.tolist(),
+        "per_class": per_class,
+        "expected_calibration_error": ece,
+        "calibration": calibration,
+        "escalation_threshold": threshold,
+        "escalation_rate": float(escalated.mean()) if total else 0.0,
+        "accuracy_not_escalated": float(correct[~escalated].mean()) if (~escalated).any() else None,
+    }
+
+def print_report(report, class_names):
+    print(f"Images:          {report['images']}")
+    print(f"Accuracy:        {report['accuracy']:.2%}")
+    print(f"Throughput:      {report['images_per_second']:.1f} images/s")
+    print(f"Escalation rate: {report['escalation_rate']:.2%} (confidence < {report['escalation_threshold']})")
+    if report["accuracy_not_escalated"] is not None:
+        print(f"Accuracy when not escalated: {report['accuracy_not_escalated']:.2%}")
+    print(f"Expected calibration error:  {report['expected_calibration_error']:.4f}")
+
+    width = max(len(name) for name in class_names) + 2
+    print("\nConfusion matrix (rows: actual, columns: predicted)")
+    print(" " * width + "".join(name.rjust(width) for name in class_names))
+    for name, row in zip(class_names, report["confusion_matrix"]):
+        print(name.ljust(width) + "".join(str(count).rjust(width) for count in row))
+
+    print("\nPer class")
+    for name, metrics in report["per_class"].items():
+        print(f"{name.ljust(width)}precision {metrics['precision']:.3f}  recall {metrics['recall']:.3f}  f1 {metrics['f1']:.3f}  support {metrics['support']}")
+
+    print("\nCalibration")
+    for row in report["calibration"]:
+        print(f"{row['bin']}  n={row['count']:<7} confidence {row['confidence']:.3f}  accuracy {row['accuracy']:.3f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate a screening model on a labelled image folder")
+    parser.add_argument("data_dir", help="Directory with one sub-directory per class")
+    parser.add_argument("--model", default="./model/best.pt")
+    parser.add_argument("--labels", default="./model/labels.txt")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Decoding processes")
+    parser.add_argument("--threads", type=int, default=os.cpu_count(), help="Torch threads for inference")
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--threshold", type=float, default=0.9, help="Confidence below which a screening is escalated")
+    parser.add_argument("--json", help="Also write the report to this JSON file")
+    args = parser.parse_args()
+
+    import torch
+
+    class_names = load_labels(args.labels)
+    # the serving split of cores across inference slots doesn't apply to a batch run
+    torch.set_num_threads(args.threads)
+    model = load_yolo(args.model, configure_threads=False)
+    # map the model's class indices onto labels.txt order
+    model_to_label = {idx: class_names.index(name) for idx, name in model.names.items()}
+
+    confusion = np.zeros((len(class_names), len(class_names)), dtype=np.int64)
+    confidences = []
+    correct = []
+    skipped = 0
+
+    def run_batch(images, labels):
+        for result, label in zip(model.predict(images, imgsz=args.imgsz, save=False, verbose=False), labels):
+            predicted = model_to_label[result.probs.top1]
+            confusion[label, predicted] += 1
+            confidences.append(result.probs.top1conf.item())
+            correct.append(predicted == label)
+
+    start = time.perf_counter()
+    images, labels = [], []
+    decoded = iter_decoded(iter_labelled_images(args.data_dir, class_names), args.workers, args.imgsz, args.batch_size * 4)
+    for path, label, image in decoded:
+        if image is None:
+            skipped += 1
+            print(f"Skipping unreadable image: {path}")
+            continue
+        images.append(image)
+        labels.append(label)
+        if len(images) == args.batch_size:
+            run_batch(images, labels)
+            images, labels = [], []
+    if images:
+        run_batch(images, labels)
+    elapsed = time.perf_counter() - start
+
+    report = compute_report(confusion, np.array(confidences), np.array(correct, dtype=bool), class_names, args.threshold)
+    report["images_per_second"] = report["images"] / elapsed if elapsed else 0.0
+    report["skipped"] = skipped
+    print_report(report, class_names)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -165,6 +165,10 @@ def main():
             if st.session_state.user_category == "reviewer" and st.session_state.approved:
                 if st.button("View Records", use_container_width=True):
                     st.switch_page("pages/4_records.py")
+                if st.button("View Statistics", use_container_width=True):
+                    st.switch_page("pages/5_Statistics.py")
+                if st.button("Review Queue", use_container_width=True):
+                    st.switch_page("pages/6_Review_Queue.py")
         else:
             if st.button("Login", use_container_width=True):
                 st.switch_page("pages/1_Login.py")
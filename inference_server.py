@@ -0,0 +1,163 @@
+"""Shared inference process for multi-worker deployments.
+
+Loads ./model/best.pt once and serves classifications over HTTP to every
+Streamlit worker that has INFERENCE_URL pointing here. See deploy/README.md.
+
+    python inference_server.py --host 127.0.0.1 --port 8600
+"""
+import argparse
+import io
+import json
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from PIL import Image
+from dotenv import load_dotenv
+from utils.inference_gate import InferenceBusyError
+from utils.model_manager import ModelManager
+from utils.screening_artifact import ScreeningArtifact
+from utils.tools import load_yolo
+
+logger = logging.getLogger(__name__)
+
+class InferenceHandler(BaseHTTPRequestHandler):
+    manager = None
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok"})
+        elif self.path == "/model/status":
+            self._send_json(200, self.manager.status())
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path.startswith("/model/"):
+            self._handle_model_command()
+            return
+        if self.path == "/saliency":
+            self._handle_saliency()
+            return
+        if self.path != "/classify":
+            self._send_json(404, {"error": "not found"})
+            return
+        try:
+            data = self.rfile.read(int(self.headers["Content-Length"]))
+            image = Image.open(io.BytesIO(data)).convert("RGB")
+        except Exception as e:
+            self._send_json(400, {"error": f"Invalid image: {e}"})
+            return
+
+        tta = self.headers.get("X-TTA")
+        tta = None if tta is None else tta == "true"
+        if self.headers.get("X-Queue-Updates") == "true":
+            self._classify_with_updates(image, tta)
+            return
+        try:
+            class_name, conf_score = self.manager.classify(image, tta)
+        except InferenceBusyError as e:
+            self._send_json(503, {"error": str(e)})
+            return
+        except Exception as e:
+            logger.error(f"Error classifying image: {e}", exc_info=True)
+            self._send_json(500, {"error": str(e)})
+            return
+        self._send_json(200, {"class_name": class_name, "conf_score": conf_score})
+
+    def _write_line(self, payload):
+        self.wfile.write(json.dumps(payload).encode() + b"\n")
+        self.wfile.flush()
+
+    def _classify_with_updates(self, image, tta):
+        """Stream the request's queue position as NDJSON lines while it waits, then the result or error"""
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        last_position = None
+
+        def on_wait(position):
+            nonlocal last_position
+            if position != last_position:
+                last_position = position
+                self._write_line({"position": position})
+
+        try:
+            class_name, conf_score = self.manager.classify(image, tta, on_wait)
+            self._write_line({"class_name": class_name, "conf_score": conf_score})
+        except (BrokenPipeError, ConnectionResetError):
+            # the worker gave up; leaving acquire() has already freed its place in the queue
+            pass
+        except InferenceBusyError as e:
+            self._write_line({"error": str(e), "busy": True})
+        except Exception as e:
+            logger.error(f"Error classifying image: {e}", exc_info=True)
+            self._write_line({"error": str(e)})
+
+    def _handle_saliency(self):
+        """Grad-CAM heatmap for an escalated image, rendered here so app workers never load the weights"""
+        try:
+            data = self.rfile.read(int(self.headers["Content-Length"]))
+            artifact = ScreeningArtifact(data, self.headers.get("X-Image-Name", "upload.jpg"))
+        except Exception as e:
+            self._send_json(400, {"error": f"Invalid image: {e}"})
+            return
+        try:
+            jpeg = self.manager.saliency(artifact, self.headers["X-Class-Name"])
+        except Exception as e:
+            logger.error(f"Error rendering saliency map: {e}", exc_info=True)
+            self._send_json(500, {"error": str(e)})
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "image/jpeg")
+        self.send_header("Content-Length", str(len(jpeg)))
+        self.end_headers()
+        self.wfile.write(jpeg)
+
+    def _handle_model_command(self):
+        """Model hot-swap commands, mirroring ModelManager's methods"""
+        try:
+            payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            if self.path == "/model/candidate":
+                self.manager.load_candidate(payload["path"])
+            elif self.path == "/model/promote":
+                self.manager.promote()
+            elif self.path == "/model/discard":
+                self.manager.discard_candidate()
+            elif self.path == "/model/shadow":
+                self.manager.set_shadow_fraction(payload["fraction"])
+            else:
+                self._send_json(404, {"error": "not found"})
+                return
+        except Exception as e:
+            logger.error(f"Error handling {self.path}: {e}", exc_info=True)
+            self._send_json(400, {"error": str(e)})
+            return
+        self._send_json(200, self.manager.status())
+
+    def log_message(self, format, *args):
+        logger.debug(format, *args)
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve screening model inference to app workers")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--model", default="./model/best.pt")
+    args = parser.parse_args()
+
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO)
+    InferenceHandler.manager = ModelManager(load_yolo(args.model), args.model)
+
+    server = ThreadingHTTPServer((args.host, args.port), InferenceHandler)
+    logger.info(f"Inference server listening on {args.host}:{args.port}")
+    server.serve_forever()
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,7 @@ import streamlit as st
 from supabase import create_client
 from datetime import datetime
 import os
+from utils.async_supabase import run_sync, sign_in_with_profile
 
 # Initialize Supabase client
 supabase = create_client(
@@ -27,16 +28,6 @@ def init_session_state():
     if "user_category" not in st.session_state:
         st.session_state.user_category = None
 
-def get_user_metadata(user_id):
-    """Fetch user metadata from Supabase"""
-    try:
-        response = supabase.table('profiles').select('username','email','facility','approved','user_category').eq('id', user_id).single().execute()
-        return response.data if response.data else None
-    except Exception as e:
-        st.error(f"Error fetching user metadata: {str(e)}")
-        return None
-
-
 def login_page():
     st.set_page_config(initial_sidebar_state="collapsed")
     st.markdown("<h1 style='text-align: center; color: #A5FFFD; border: 2px solid #30B0C2; border-radius: 10px; padding: 10px;'>Cervical Cancer Screening Tool</h1>", unsafe_allow_html=True)
@@ -57,20 +48,11 @@ def login_page():
     if st.button("Login"):
         if email and password:
             try:
-                # Attempt to sign in with Supabase
-                response = supabase.auth.sign_in_with_password({
-                    "email": email,
-                    "password": password
-                })
-                
-                # Get user data from response
-                user = response.user
+                # Sign in, then fetch user metadata (like facility)
+                user, user_metadata = run_sync(sign_in_with_profile(email, password))
                 
                 if user:
-                    # Fetch user metadata (like facility)
-                    user_metadata = get_user_metadata(user.id)
-
-                    if not user_metadata.get("approved"):
+                    if not user_metadata or not user_metadata.get("approved"):
                         st.error("Your account is pending approval by an admin which usually takes 24hours at the most.")                     
                         return
                     
@@ -1,14 +1,21 @@
 import streamlit as st
-from utils.supabase_utils import init_supabase, save_image_to_supabase, save_screening_data
-from utils.email_utils import send_to_clinician
-from PIL import Image
+from utils.supabase_utils import init_supabase, record_screening
+from utils.async_supabase import escalate_screening
 import os
-import torch
-from ultralytics import YOLO
 from utils.auth import check_auth
-from utils.tools import classify, set_background
+from utils.tools import set_background
+from utils.model_manager import load_model
+from utils.inference_gate import InferenceBusyError
+from utils.screening_artifact import ScreeningArtifact
+from utils.image_quality import assess_image_quality
+from utils.profiling import profiler
+from utils.session_budget import get_session_budget
+from utils.phash_index import get_phash_index, perceptual_hash
+import logging
 from dotenv import load_dotenv
 
+logger = logging.getLogger(__name__)
+
 # Load environment variables and initialize Supabase
 load_dotenv()
 supabase = init_supabase()
@@ -29,6 +36,49 @@ def logout():
     except Exception as e:
         st.error(f"Error during logout: {str(e)}")
 
+def screen_artifact(model, artifact, image, quality_flags, phash, budget):
+    """Classify the image, record it in the stats and duplicate index, and show the result"""
+    queue_status = st.empty()
+    try:
+        with profiler.track("classify"):
+            class_name, conf_score = model.classify(
+                image,
+                on_wait=lambda position: queue_status.info(f"Waiting for the screening model... you are number {position} in the queue."),
+                data=artifact.data
+            )
+    except InferenceBusyError as e:
+        queue_status.empty()
+        st.error(str(e))
+        st.stop()
+    queue_status.empty()
+    record_screening(supabase, st.session_state.facility, class_name)
+    phash_id = get_phash_index().add(phash, artifact.image_hash, st.session_state.facility, class_name, conf_score, artifact.thumbnail)
+    show_screening_result(artifact, quality_flags, class_name, conf_score, phash_id, False, budget)
+
+def show_screening_result(artifact, quality_flags, class_name, conf_score, phash_id, already_escalated, budget):
+    """Keep the result for escalation and display it"""
+    # keep only the encoded bytes in session state; escalation needs the JPEG and thumbnail
+    artifact.release(encode=conf_score < 0.9 and not already_escalated)
+    if already_escalated:
+        st.session_state.screening_data = {'artifact': None, 'diagnosis': None, 'quality_flags': [], 'client_code': None, 'phash_id': None}
+        budget.forget()
+    else:
+        st.session_state.screening_data.update({
+            'artifact': artifact,
+            'diagnosis': {'class_name': class_name, 'conf_score': conf_score},
+            'quality_flags': quality_flags,
+            'phash_id': phash_id
+        })
+        budget.track(artifact)
+
+    st.subheader(f"Diagnosis: {class_name}")
+    st.write(f"Confidence Score: {conf_score:.2%}")
+
+    if already_escalated:
+        st.success("That screening has already been escalated to a clinician.")
+    elif conf_score < 0.9:
+        st.warning("Confidence score is below 90%. Consider escalating to a clinician.")
+
 # Main function
 def screening_page():
     st.set_page_config(initial_sidebar_state="collapsed")
@@ -45,67 +95,123 @@ def screening_page():
     # Initialize session state
     if 'screening_data' not in st.session_state:
         st.session_state.screening_data = {
-            'image': None,
+            'artifact': None,
             'diagnosis': None,
-            'client_code': None
+            'quality_flags': [],
+            'client_code': None,
+            'phash_id': None
         }
 
+    budget = get_session_budget()
+    budget.touch()
+    artifact = st.session_state.screening_data['artifact']
+    if artifact is not None and artifact.evicted:
+        st.info("The previous screening image was cleared from memory after inactivity. Please upload it again to escalate it.")
+        st.session_state.screening_data = {'artifact': None, 'diagnosis': None, 'quality_flags': [], 'client_code': None, 'phash_id': None}
+    pending = st.session_state.get('pending_duplicate')
+    if pending is not None and pending['artifact'].evicted:
+        st.session_state.pending_duplicate = None
+
     # Upload file
     file = st.file_uploader(label='Upload image for screening', type=['jpeg', 'jpg', 'png'])
 
     # Load model
     try:
-        model = YOLO("./model/best.pt")
-        model.to(torch.device('cuda' if torch.cuda.is_available() else 'cpu'))
+        model = load_model()
     except Exception as e:
         st.error(f"Error loading model: {str(e)}")
         st.stop()
 
     # Process image
     if st.button("Screen") and file is not None:
-        image = Image.open(file).convert('RGB')
+        artifact = ScreeningArtifact.from_upload(file)
+        image = artifact.image()
         st.image(image, use_column_width=False, width=400, caption='Uploaded Image')
 
-        class_name, conf_score = classify(image, model)
-        st.session_state.screening_data.update({
-            'image': image,
-            'diagnosis': {'class_name': class_name, 'conf_score': conf_score}
-        })
+        # Reject unusable images before spending a forward pass on them
+        quality = assess_image_quality(artifact.array)
+        if quality['rejected']:
+            logger.info(f"Image rejected by quality check at {st.session_state.facility}: {quality['reasons']}")
+            st.error("This image cannot be screened: " + "; ".join(quality['reasons']) + ". Please retake the image.")
+            st.stop()
+        for flag in quality['flags']:
+            st.warning(flag)
 
-        st.subheader(f"Diagnosis: {class_name}")
-        st.write(f"Confidence Score: {conf_score:.2%}")
+        # A retake or resized re-upload can reuse the earlier result, but only once the
+        # clinician confirms it is the same client; pressing Screen again runs the model
+        phash = perceptual_hash(artifact.array)
+        pending = st.session_state.get('pending_duplicate')
+        declined = pending is not None and pending['artifact'].image_hash == artifact.image_hash
+        match = None if declined else get_phash_index().lookup(phash, st.session_state.facility)
+        st.session_state.pending_duplicate = None
+        if match:
+            # the comparison only shows the thumbnail
+            artifact.encode_previews(jpeg=False)
+            artifact.release()
+            st.session_state.pending_duplicate = {'artifact': artifact, 'quality_flags': quality['flags'], 'phash': phash, 'match': match}
+            st.session_state.screening_data = {'artifact': None, 'diagnosis': None, 'quality_flags': [], 'client_code': None, 'phash_id': None}
+            budget.track(artifact)
+        else:
+            screen_artifact(model, artifact, image, quality['flags'], phash, budget)
 
-        if conf_score < 0.9:
-            st.warning("Confidence score is below 90%. Consider escalating to a clinician.")
+    # Ask before reusing a near-duplicate's result
+    pending = st.session_state.get('pending_duplicate')
+    if pending is not None:
+        match = pending['match']
+        st.info(f"This image looks very similar to one screened at this facility at {match['created_at'][11:16]}. If it is the same client, the earlier result can be reused instead of screening again.")
+        col1, col2 = st.columns(2)
+        with col1:
+            st.image(pending['artifact'].thumbnail, caption='This image')
+        with col2:
+            if match['thumbnail']:
+                st.image(match['thumbnail'], caption=f"Screened at {match['created_at'][11:16]}")
+        col1, col2 = st.columns(2)
+        with col1:
+            screen_anyway = st.button("Screen this image", type="primary", use_container_width=True)
+        with col2:
+            reuse = st.button("Same client, reuse earlier result", use_container_width=True)
+        if screen_anyway or reuse:
+            st.session_state.pending_duplicate = None
+            artifact = pending['artifact']
+            if reuse:
+                logger.info(f"Reusing screening {match['image_hash']} for near-duplicate {artifact.image_hash} (distance {match['distance']})")
+                show_screening_result(artifact, pending['quality_flags'], match['class_name'], match['conf_score'], match['id'], bool(match['escalated']), budget)
+            else:
+                screen_artifact(model, artifact, artifact.image(), pending['quality_flags'], pending['phash'], budget)
 
     # Escalate to clinician
     if (st.session_state.screening_data['diagnosis'] is not None and 
         st.session_state.screening_data['diagnosis']['conf_score'] < 0.9):
-        
+
+        st.image(st.session_state.screening_data['artifact'].thumbnail, caption='Image to escalate')
         client_code = st.text_input("Client_Code", placeholder="Please enter the client code")
         st.session_state.screening_data['client_code'] = client_code
 
         if st.button("Escalate to Clinician", key="escalate_button"):
             with st.spinner("Sending to clinician..."):
-                image_url = save_image_to_supabase(supabase, file, client_code)
-                save_screening_data(
-                    supabase,
-                    image_url,
-                    st.session_state.screening_data['diagnosis']['class_name'],
-                    st.session_state.screening_data['diagnosis']['conf_score'],
-                    st.session_state.facility,
-                    client_code
-                )
-                
-                if send_to_clinician(
-                    st.session_state.screening_data['image'], 
-                    st.session_state.screening_data['diagnosis']['class_name'],
-                    st.session_state.screening_data['diagnosis']['conf_score'],
-                    st.session_state.facility,
-                    client_code
-                ):
+                upload_progress = st.progress(0.0, text="Uploading image...")
+                try:
+                    with profiler.track("escalation"):
+                        email_sent = escalate_screening(
+                            supabase,
+                            st.session_state.screening_data['artifact'],
+                            st.session_state.screening_data['diagnosis']['class_name'],
+                            st.session_state.screening_data['diagnosis']['conf_score'],
+                            st.session_state.facility,
+                            client_code,
+                            st.session_state.screening_data['quality_flags'],
+                            lambda sent, total: upload_progress.progress(sent / total if total else 1.0, text=f"Uploading image... {sent // 1024} / {total // 1024} KB"),
+                            model=model
+                        )
+                except Exception as e:
+                    logger.error(f"Error escalating screening: {e}", exc_info=True)
+                    email_sent = False
+
+                if email_sent:
                     st.success("Successfully sent to clinician for review!")
-                    st.session_state.screening_data = {'image': None, 'diagnosis': None, 'client_code': None}
+                    get_phash_index().mark_escalated(st.session_state.screening_data.get('phash_id'))
+                    budget.forget()
+                    st.session_state.screening_data = {'artifact': None, 'diagnosis': None, 'quality_flags': [], 'client_code': None, 'phash_id': None}
                 else:
                     st.error("Failed to send to clinician. Please try again or contact support.")
     # Logout button at the bottom
@@ -3,6 +3,9 @@ from supabase import create_client
 import os
 from utils.tools import set_background
 from utils.auth import check_auth
+from utils.export_utils import export_screenings
+from utils.screening_mirror import get_mirror
+from utils.profiling import profiler
 
 # Initialize Supabase client
 supabase = create_client(
@@ -10,14 +13,46 @@ supabase = create_client(
     os.getenv("SUPABASE_KEY")
 )
 
-def fetch_screening_records():
-    """Fetch all screening records from the Supabase table"""
+PAGE_SIZE = 100
+
+def fetch_screening_records(facility, start_date, end_date, order_by, descending, page):
+    """Fetch one page of screening records and the total matching count from the local mirror after pulling any new rows"""
+    mirror = get_mirror()
+    mirror.sync_if_stale(supabase)
     try:
-        response = supabase.table("screenings").select("*").execute()
-        return response.data
+        total = mirror.count(facility, start_date, end_date)
+        records = mirror.query(facility, start_date, end_date, order_by, descending, limit=PAGE_SIZE, offset=(page - 1) * PAGE_SIZE)
+        return records, total
     except Exception as e:
         st.error(f"Error fetching screening records: {str(e)}")
-        return []
+        return [], 0
+
+def export_section():
+    """Render the export controls for streaming screening records to CSV or Parquet"""
+    with st.expander("Export records"):
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            facility = st.text_input("Facility", placeholder="All facilities", key="export_facility")
+        with col2:
+            start_date = st.date_input("From", value=None, key="export_start")
+        with col3:
+            end_date = st.date_input("To", value=None, key="export_end")
+        with col4:
+            fmt = st.selectbox("Format", options=["csv", "parquet"], key="export_format")
+
+        if st.button("Prepare export"):
+            try:
+                with st.spinner("Exporting records..."):
+                    data, count = export_screenings(supabase, fmt, facility.strip() or None, start_date, end_date)
+                st.success(f"Exported {count} records.")
+                st.download_button(
+                    "Download export",
+                    data=data,
+                    file_name=f"screenings.{fmt}",
+                    mime="text/csv" if fmt == "csv" else "application/vnd.apache.parquet",
+                )
+            except Exception as e:
+                st.error(f"Error exporting screening records: {str(e)}")
 
 def logout():
     """Sign out the user from Supabase and clear session state"""
@@ -52,18 +87,55 @@ def records_page():
 
     st.markdown("<h1 style='text-align: center; color: #A5FFFD; border: 2px solid #30B0C2; border-radius: 10px; padding: 10px;'>Screening Records</h1>", unsafe_allow_html=True)
 
+    export_section()
+
+    # Filters and sorting run against the local mirror
+    col1, col2, col3, col4, col5 = st.columns([2, 2, 2, 2, 1])
+    with col1:
+        facility = st.selectbox("Facility", options=get_mirror().facilities(), index=None, placeholder="All facilities")
+    with col2:
+        start_date = st.date_input("From", value=None)
+    with col3:
+        end_date = st.date_input("To", value=None)
+    with col4:
+        order_by = st.selectbox(
+            "Sort by",
+            options=["created_at", "confidence_score", "facility", "diagnosis", "client_code"],
+            format_func=lambda x: x.replace("_", " ").title()
+        )
+    with col5:
+        descending = st.toggle("Descending", value=True)
+
+    if st.button("Refresh"):
+        get_mirror().sync(supabase)
+
     # Fetch and display records
-    records = fetch_screening_records()
+    page = st.session_state.get("records_page", 1)
+    with profiler.track("records"):
+        records, total = fetch_screening_records(facility, start_date, end_date, order_by, descending, page)
     if not records:
+        if total:
+            # filters changed under a later page; start again from the first
+            st.session_state.records_page = 1
+            st.rerun()
         st.info("No screening records found.")
         return
 
+    pages = (total + PAGE_SIZE - 1) // PAGE_SIZE
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        st.number_input("Page", min_value=1, max_value=pages, key="records_page")
+    with col2:
+        first = (page - 1) * PAGE_SIZE + 1
+        st.caption(f"Showing records {first}–{first + len(records) - 1} of {total} (page {page} of {pages})")
+
     # Display records in a table
     st.dataframe(
         records,
         use_container_width=True,
         column_config={
             "image_url": st.column_config.ImageColumn("Image", help="Screened Image"),
+            "saliency_url": st.column_config.ImageColumn("Saliency", help="Regions that drove the model's diagnosis"),
             "diagnosis": st.column_config.TextColumn("Diagnosis"),
             "confidence_score": st.column_config.ProgressColumn(
                 "Confidence Score",
@@ -0,0 +1,87 @@
+import streamlit as st
+import pandas as pd
+from datetime import date, timedelta
+from utils.supabase_utils import init_supabase, fetch_screening_stats
+from utils.tools import set_background
+from utils.auth import check_auth
+from utils.screening_mirror import get_mirror
+from dotenv import load_dotenv
+
+# Load environment variables and initialize Supabase
+load_dotenv()
+supabase = init_supabase()
+
+@st.cache_data(ttl=300)
+def load_stats(facility, since):
+    """Fetch aggregated screening statistics, cached for five minutes"""
+    try:
+        return fetch_screening_stats(supabase, facility, since)
+    except Exception as e:
+        st.error(f"Error fetching screening statistics: {str(e)}")
+        return []
+
+def statistics_page():
+    st.set_page_config(
+        page_title="Screening Statistics",
+        page_icon="📊",
+        layout="wide",
+        initial_sidebar_state="collapsed"
+    )
+    set_background('./bgs/654.jpg')
+
+    # Check authentication and user category
+    check_auth()
+    if st.session_state.get("user_category") not in ("reviewer", "admin") or not st.session_state.approved:
+        st.error("You do not have permission to access this page.")
+        st.stop()
+
+    st.markdown("<h1 style='text-align: center; color: #A5FFFD; border: 2px solid #30B0C2; border-radius: 10px; padding: 10px;'>Screening Statistics</h1>", unsafe_allow_html=True)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        facility = st.text_input("Facility", placeholder="All facilities")
+    with col2:
+        weeks = st.number_input("Weeks to show", min_value=1, max_value=104, value=12)
+
+    since = date.today() - timedelta(weeks=int(weeks))
+    stats = load_stats(facility.strip() or None, since)
+    if not stats:
+        st.info("No screening statistics found.")
+        return
+
+    df = pd.DataFrame(stats)
+    totals = df[["screened", "escalated"]].sum()
+    rate = totals["escalated"] / totals["screened"] if totals["screened"] else 0
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Screened", int(totals["screened"]))
+    col2.metric("Escalated", int(totals["escalated"]))
+    col3.metric("Escalation Rate", f"{rate:.1%}")
+
+    st.write("### By Facility")
+    by_facility = df.groupby("facility")[["screened", "escalated"]].sum()
+    by_facility["escalation_rate"] = by_facility["escalated"] / by_facility["screened"].where(by_facility["screened"] > 0)
+    st.dataframe(
+        by_facility,
+        use_container_width=True,
+        column_config={
+            "escalation_rate": st.column_config.NumberColumn("Escalation Rate", format="%.2f"),
+        },
+    )
+
+    st.write("### Screenings per Week by Diagnosis")
+    st.bar_chart(df.pivot_table(index="week", columns="diagnosis", values="screened", aggfunc="sum", fill_value=0))
+
+    st.write("### Escalations per Week by Facility")
+    st.line_chart(df.pivot_table(index="week", columns="facility", values="escalated", aggfunc="sum", fill_value=0))
+
+    # Confidence breakdown of escalated screenings, served from the local mirror
+    mirror = get_mirror()
+    mirror.sync_if_stale(supabase)
+    escalations = mirror.aggregate(facility.strip() or None, since)
+    if escalations:
+        st.write("### Mean Confidence of Escalations by Diagnosis")
+        st.line_chart(pd.DataFrame(escalations).pivot_table(index="week", columns="diagnosis", values="mean_confidence", aggfunc="mean"))
+
+if __name__ == "__main__":
+    statistics_page()
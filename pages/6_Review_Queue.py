@@ -0,0 +1,130 @@
+import streamlit as st
+import os
+import logging
+from utils.supabase_utils import init_supabase
+from utils.async_supabase import run_sync, subscribe_screening_changes
+from utils.review_queue import review_queue, claim_screening, release_screening, resolve_screening
+from utils.tools import set_background
+from utils.auth import check_auth
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+# Load environment variables and initialize Supabase
+load_dotenv()
+supabase = init_supabase()
+
+@st.cache_resource
+def start_review_feed():
+    """Load the open escalations and subscribe to screening changes once per process"""
+    review_queue.load(supabase)
+    try:
+        run_sync(subscribe_screening_changes(review_queue.on_change, review_queue.on_status))
+    except Exception as e:
+        # escalations made in this process still reach the queue without realtime
+        logger.error(f"Error subscribing to screening changes: {e}", exc_info=True)
+    return review_queue
+
+def queue_item(item):
+    """Render one escalation with the actions open to the current reviewer"""
+    user_id = st.session_state.user_id
+    with st.container(border=True):
+        col1, col2, col3 = st.columns([1, 2, 2])
+        with col1:
+            if item.get("image_url"):
+                st.image(item["image_url"], width=160)
+        with col2:
+            st.write(f"**{item['diagnosis']}** at {item['confidence_score']:.2%} confidence")
+            st.write(f"Facility: {item['facility']} · Client Code: {item['client_code']}")
+            st.caption(f"Escalated {item['created_at'][:16].replace('T', ' ')}")
+            for flag in item.get("quality_flags") or []:
+                st.caption(f"⚠️ {flag}")
+            if item.get("saliency_url"):
+                st.link_button("Saliency map", item["saliency_url"])
+        with col3:
+            try:
+                if item["status"] == "pending":
+                    if st.button("Claim", key=f"claim_{item['id']}", use_container_width=True):
+                        if not claim_screening(supabase, item["id"], user_id):
+                            st.warning("Another reviewer has already claimed this screening.")
+                        else:
+                            st.rerun(scope="fragment")
+                elif item.get("claimed_by") == user_id:
+                    notes = st.text_area("Review notes", key=f"notes_{item['id']}", height=80)
+                    if st.button("Resolve", key=f"resolve_{item['id']}", type="primary", use_container_width=True):
+                        resolve_screening(supabase, item["id"], user_id, notes)
+                        st.rerun(scope="fragment")
+                    if st.button("Release", key=f"release_{item['id']}", use_container_width=True):
+                        release_screening(supabase, item["id"], user_id)
+                        st.rerun(scope="fragment")
+                else:
+                    st.info("Claimed by another reviewer")
+            except Exception as e:
+                st.error(f"Error updating screening: {str(e)}")
+
+@st.fragment(run_every=float(os.getenv("REVIEW_QUEUE_REFRESH_SECONDS", 2)))
+def review_queue_fragment(queue, facility, mine_only):
+    """Re-render the queue from memory, announcing escalations that arrived since the last run"""
+    if queue.needs_reload:
+        try:
+            queue.load(supabase)
+        except Exception as e:
+            st.error(f"Error reloading the review queue: {str(e)}")
+
+    items = queue.items()
+    seen = st.session_state.get("review_queue_seen")
+    if seen is not None:
+        for item in items:
+            if item["id"] not in seen:
+                st.toast(f"New escalation from {item['facility']}: {item['diagnosis']}")
+    st.session_state.review_queue_seen = {item["id"] for item in items}
+
+    if facility:
+        items = [item for item in items if item.get("facility") == facility]
+    if mine_only:
+        items = [item for item in items if item.get("claimed_by") == st.session_state.user_id]
+    pending = sum(item["status"] == "pending" for item in items)
+    st.caption(f"{pending} waiting · {len(items) - pending} claimed · live updates: {queue.realtime_status or 'this server only'}")
+    if queue.truncated:
+        st.warning("Only the newest open escalations were loaded. Older open escalations are not shown; see the Records page for the full list.")
+    if not items:
+        st.info("No escalations waiting for review.")
+    for item in items:
+        queue_item(item)
+
+def review_queue_page():
+    st.set_page_config(
+        page_title="Review Queue",
+        page_icon="🩺",
+        layout="wide",
+        initial_sidebar_state="collapsed"
+    )
+    set_background('./bgs/654.jpg')
+
+    # Check authentication and user category
+    check_auth()
+    if st.session_state.get("user_category") not in ("reviewer", "admin") or not st.session_state.approved:
+        st.error("You do not have permission to access this page.")
+        st.stop()
+
+    st.markdown("<h1 style='text-align: center; color: #A5FFFD; border: 2px solid #30B0C2; border-radius: 10px; padding: 10px;'>Review Queue</h1>", unsafe_allow_html=True)
+
+    try:
+        queue = start_review_feed()
+    except Exception as e:
+        st.error(f"Error loading the review queue: {str(e)}")
+        st.stop()
+
+    col1, col2, col3 = st.columns([3, 2, 1])
+    with col1:
+        facility = st.text_input("Facility", placeholder="All facilities")
+    with col2:
+        mine_only = st.toggle("Only my claims")
+    with col3:
+        if st.button("Reload", use_container_width=True):
+            queue.needs_reload = True
+
+    review_queue_fragment(queue, facility.strip() or None, mine_only)
+
+if __name__ == "__main__":
+    review_queue_page()
@@ -0,0 +1,60 @@
+-- Per-facility screening statistics.
+--
+-- `screening_stats` is an incrementally maintained summary table keyed by
+-- facility, diagnosis class and ISO week. Every screened image bumps
+-- `screened` through the `record_screening` RPC, and every row inserted into
+-- `screenings` (an escalation) bumps `escalated` through a trigger, so the
+-- dashboard never has to scan the screenings table.
+
+create table if not exists public.screening_stats (
+    facility   text        not null,
+    diagnosis  text        not null,
+    week       date        not null,
+    screened   bigint      not null default 0,
+    escalated  bigint      not null default 0,
+    updated_at timestamptz not null default now(),
+    primary key (facility, diagnosis, week)
+);
+
+create or replace function public.record_screening(p_facility text, p_diagnosis text)
+returns void
+language sql
+security definer
+as $$
+    insert into public.screening_stats (facility, diagnosis, week, screened)
+    values (coalesce(p_facility, 'unknown'), p_diagnosis, date_trunc('week', now())::date, 1)
+    on conflict (facility, diagnosis, week)
+    do update set screened = screening_stats.screened + 1, updated_at = now();
+$$;
+
+create or replace function public.bump_escalation_stats()
+returns trigger
+language plpgsql
+security definer
+as $$
+begin
+    insert into public.screening_stats (facility, diagnosis, week, escalated)
+    values (coalesce(new.facility, 'unknown'), new.diagnosis,
+            date_trunc('week', coalesce(new.created_at, now()))::date, 1)
+    on conflict (facility, diagnosis, week)
+    do update set escalated = screening_stats.escalated + 1, updated_at = now();
+    return new;
+end;
+$$;
+
+drop trigger if exists screenings_bump_stats on public.screenings;
+create trigger screenings_bump_stats
+    after insert on public.screenings
+    for each row execute function public.bump_escalation_stats();
+
+-- Facility-level roll-up with escalation rate, for quick lookups.
+create or replace view public.facility_screening_stats as
+select
+    facility,
+    sum(screened)  as screened,
+    sum(escalated) as escalated,
+    case when sum(screened) > 0
+         then sum(escalated)::numeric / sum(screened)
+         else null end as escalation_rate
+from public.screening_stats
+group by facility;
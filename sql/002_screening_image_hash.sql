@@ -0,0 +1,7 @@
+-- Screening images are stored under the SHA-256 of their bytes, so repeat
+-- escalations of the same image share one storage object. Rows reference the
+-- hash directly for lookups and de-duplication.
+
+alter table public.screenings add column if not exists image_hash text;
+
+create index if not exists screenings_image_hash_idx on public.screenings (image_hash);
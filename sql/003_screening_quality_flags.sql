@@ -0,0 +1,5 @@
+-- Non-blocking image quality issues found before inference (slight blur,
+-- unusual exposure, possibly not a cervigram), kept with the escalation so
+-- reviewers can weigh the model's confidence accordingly.
+
+alter table public.screenings add column if not exists quality_flags text[] not null default '{}';
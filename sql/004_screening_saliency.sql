@@ -0,0 +1,5 @@
+-- Grad-CAM heatmaps are generated in the background after an escalation is
+-- saved, stored beside the image as <image_hash>_cam.jpg, and linked here
+-- once ready.
+
+alter table public.screenings add column if not exists saliency_url text;
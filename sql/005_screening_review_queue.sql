@@ -0,0 +1,28 @@
+-- Reviewer queue: escalated screenings are claimed by a reviewer and then
+-- resolved. Claims are conditional updates on status, so two reviewers can't
+-- take the same item. The table is added to the realtime publication so the
+-- review queue page receives inserts and updates as they happen. Existing
+-- escalations were already handled by email, so they are backfilled as
+-- resolved; only escalations made after this migration enter the queue.
+
+alter table public.screenings add column if not exists status text;
+update public.screenings set status = 'resolved' where status is null;
+alter table public.screenings alter column status set default 'pending';
+alter table public.screenings alter column status set not null;
+alter table public.screenings add column if not exists claimed_by uuid references auth.users (id);
+alter table public.screenings add column if not exists claimed_at timestamptz;
+alter table public.screenings add column if not exists resolved_at timestamptz;
+alter table public.screenings add column if not exists review_notes text;
+
+create index if not exists screenings_open_status_idx on public.screenings (created_at) where status <> 'resolved';
+
+do $$
+begin
+    if not exists (
+        select 1 from pg_publication_tables
+        where pubname = 'supabase_realtime' and schemaname = 'public' and tablename = 'screenings'
+    ) then
+        alter publication supabase_realtime add table public.screenings;
+    end if;
+end
+$$;
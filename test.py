@@ -1,6 +1,5 @@
 import streamlit as st
 from ultralytics import YOLO
-from PIL import Image
 import os
 import torch
 import smtplib
@@ -10,6 +9,8 @@ from email.mime.application import MIMEApplication
 from dotenv import load_dotenv
 
 from utils.tools import classify, set_background
+from utils.screening_artifact import ScreeningArtifact
+from utils.session_budget import get_session_budget
 
 load_dotenv()
 
@@ -95,6 +96,13 @@ if 'client_code' not in st.session_state:
     st.session_state.client_code = None
 
 
+budget = get_session_budget()
+budget.touch()
+if st.session_state.image_data is not None and st.session_state.image_data.evicted:
+    st.info("The previous image was cleared from memory after inactivity. Please upload it again.")
+    st.session_state.image_data = None
+    st.session_state.diagnosis_data = None
+
 # upload file
 file = st.file_uploader(label='Upload image for screening', type=['jpeg', 'jpg', 'png'])
 
@@ -109,14 +117,17 @@ except Exception as e:
 # display image and process
 if st.button("Screen"):
     if file is not None:
-        image = Image.open(file).convert('RGB')
+        artifact = ScreeningArtifact.from_upload(file)
+        image = artifact.image()
         st.image(image, use_column_width=False, width=400, caption='Uploaded Image')
 
         # classify image
         class_name, conf_score = classify(image, model)
 
-        # store the data in session state
-        st.session_state.image_data = image
+        # store the encoded image in session state and account for it in the memory budget
+        artifact.release()
+        st.session_state.image_data = artifact
+        budget.track(artifact)
         st.session_state.diagnosis_data = {
             'class_name': class_name,
             'conf_score': conf_score
@@ -161,7 +172,7 @@ if (st.session_state.diagnosis_data is not None
     if st.button("Escalate to Clinician", key="escalate_button"):
         with st.spinner("Sending to clinician..."):
             if send_to_clinician(
-                st.session_state.image_data, 
+                st.session_state.image_data.image(),
                 st.session_state.diagnosis_data['class_name'],
                 st.session_state.diagnosis_data['conf_score'],
                 selected_facility,
@@ -169,6 +180,7 @@ if (st.session_state.diagnosis_data is not None
             ):
                 st.success("Successfully sent to clinician for review!")
                  # Reset session state after successful escalation
+                budget.forget()
                 st.session_state.image_data = None
                 st.session_state.diagnosis_data = None
                 st.session_state.selected_facility = None
@@ -0,0 +1,134 @@
+import asyncio
+import logging
+import os
+import threading
+from supabase import AsyncClientOptions, acreate_client
+from utils.email_utils import send_to_clinician
+from utils.review_queue import review_queue
+from utils.saliency import submit_saliency
+from utils.supabase_utils import create_signed_image_url, image_public_url, save_image_to_supabase, screening_row
+
+logger = logging.getLogger(__name__)
+
+_loop = None
+_loop_lock = threading.Lock()
+_client = None
+_client_lock = None
+
+def _get_loop():
+    """Return the background event loop that owns the async client, starting it on first use"""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="supabase-async", daemon=True).start()
+        return _loop
+
+def submit(coro):
+    """Schedule a coroutine on the background loop and return a concurrent.futures.Future"""
+    return asyncio.run_coroutine_threadsafe(coro, _get_loop())
+
+def default_timeout():
+    return float(os.getenv("SUPABASE_TIMEOUT", 20))
+
+def run_sync(coro, timeout=None):
+    """Run a coroutine on the background loop and block the calling page until it finishes"""
+    return submit(coro).result(timeout or default_timeout())
+
+async def get_async_client():
+    """Return the shared async Supabase client, created on the background loop.
+
+    It always runs on the API key; nothing signs in on it, since a sign-in
+    would switch every session's requests to that user's token.
+    """
+    global _client, _client_lock
+    if _client_lock is None:
+        _client_lock = asyncio.Lock()
+    async with _client_lock:
+        if _client is None:
+            _client = await acreate_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
+    return _client
+
+async def gather_with_timeout(*aws, timeout=None, return_exceptions=False):
+    """Await independent calls concurrently, failing if they take longer than timeout overall"""
+    return await asyncio.wait_for(asyncio.gather(*aws, return_exceptions=return_exceptions), timeout or default_timeout())
+
+async def fetch_profile(client, column, value):
+    response = await client.table('profiles').select('id', 'username', 'email', 'facility', 'approved', 'user_category').eq(column, value).maybe_single().execute()
+    return response.data if response else None
+
+async def sign_in_with_profile(email, password):
+    """Sign in, then fetch the user's profile, returning (user, profile).
+
+    Runs on a client of its own that doesn't persist the session, so the
+    shared data client keeps using the API key. The profile is fetched by id
+    only once the session exists, since profiles aren't readable with the
+    API key alone. The client is closed afterwards so its connection pools
+    don't outlive the login.
+    """
+    client = await acreate_client(
+        os.getenv("SUPABASE_URL"),
+        os.getenv("SUPABASE_KEY"),
+        options=AsyncClientOptions(persist_session=False, auto_refresh_token=False),
+    )
+    try:
+        auth_response = await client.auth.sign_in_with_password({"email": email, "password": password})
+        user = auth_response.user
+        if user is None:
+            return None, None
+        return user, await fetch_profile(client, 'id', user.id)
+    finally:
+        await client.auth.close()
+        await client.postgrest.aclose()
+
+async def save_screening_row(row):
+    """Insert a screening row, returning the saved one instead when a retried escalation already stored it"""
+    client = await get_async_client()
+    existing = await client.table("screenings").select("*").eq("image_hash", row["image_hash"]).eq("client_code", row["client_code"]).limit(1).execute()
+    if existing.data:
+        return existing.data
+    return (await client.table("screenings").insert(row).execute()).data
+
+async def sign_image_link(supabase, artifact, expires_hours):
+    """Signed URL for the stored image, or None so the email falls back to attaching it"""
+    try:
+        return await asyncio.to_thread(create_signed_image_url, supabase, artifact, expires_hours * 3600)
+    except Exception as e:
+        logger.error(f"Error signing image URL, attaching image instead: {e}", exc_info=True)
+        return None
+
+async def subscribe_screening_changes(on_change, on_status=None):
+    """Subscribe to inserts, updates and deletes on screenings over Supabase Realtime"""
+    client = await get_async_client()
+    channel = client.channel("screenings-review-queue")
+    channel.on_postgres_changes("*", on_change, table="screenings", schema="public")
+    await channel.subscribe(on_status)
+    return channel
+
+def escalate_screening(supabase, artifact, class_name, conf_score, selected_facility, client_code, quality_flags=None, progress=None, model=None):
+    """Upload the image, save the screening row and email the clinician, each only once the step before succeeded.
+
+    A failed upload leaves no row, stats count or queue item behind, and the
+    email only goes out once the row exists. The row is looked up by image
+    hash and client code before inserting, so retrying after a failed email
+    reuses it instead of adding a second one. The upload runs on the calling
+    thread so its progress callback can update the page. In the default
+    "link" email mode (ESCALATION_EMAIL_MODE) the image URL is signed while
+    the row is saved, and the email carries a thumbnail and the link. It
+    falls back to attaching the image if signing fails. Once saved, the row
+    is published to this process's review queue and a saliency map is queued
+    for it when model is given. Returns whether the email was sent.
+    """
+    save_image_to_supabase(supabase, artifact, progress)
+
+    row = screening_row(image_public_url(supabase, artifact), class_name, conf_score, selected_facility, client_code, artifact.image_hash, quality_flags)
+    expires_hours = int(os.getenv("ESCALATION_LINK_HOURS", 72))
+    if os.getenv("ESCALATION_EMAIL_MODE", "link").lower() == "link":
+        saved, image_link = run_sync(gather_with_timeout(save_screening_row(row), sign_image_link(supabase, artifact, expires_hours)))
+    else:
+        saved, image_link = run_sync(save_screening_row(row)), None
+
+    review_queue.publish(saved)
+    if model is not None:
+        submit_saliency(supabase, artifact, class_name, model)
+    return send_to_clinician(artifact, class_name, conf_score, selected_facility, client_code, image_link, expires_hours)
@@ -2,15 +2,48 @@ import smtplib
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from email.mime.application import MIMEApplication
+from email.mime.image import MIMEImage
 import os
+import html
 import logging
 
 logger = logging.getLogger(__name__)
 
-def send_to_clinician(image, class_name, conf_score, selected_facility, client_code):
-    """Send image and details to clinician via email"""
+def build_attachment_message(artifact, details):
+    """Plain-text email with the full JPEG attached"""
+    message = MIMEMultipart()
+    message.attach(MIMEText(f"{details}\nPlease review the attached image."))
+
+    attachment = MIMEApplication(artifact.jpeg, Name="Image.jpg")
+    attachment['Content-Disposition'] = 'attachment; filename="Image.jpg"'
+    message.attach(attachment)
+    return message
+
+def build_link_message(artifact, details, image_link, expires_hours):
+    """Compact email with an inline thumbnail and a time-limited link to the full image"""
+    message = MIMEMultipart('related')
+    alternative = MIMEMultipart('alternative')
+    alternative.attach(MIMEText(f"{details}\nView the full image (link valid for {expires_hours} hours):\n{image_link}"))
+    html_details = html.escape(details).replace("\n", "<br>")
+    html_link = html.escape(image_link, quote=True)
+    alternative.attach(MIMEText(
+        f"<p>{html_details}</p>"
+        f'<p><a href="{html_link}"><img src="cid:thumbnail" alt="Screening image"></a></p>'
+        f'<p><a href="{html_link}">View the full image</a> (link valid for {expires_hours} hours)</p>',
+        'html'
+    ))
+    message.attach(alternative)
+
+    thumbnail = MIMEImage(artifact.thumbnail, 'jpeg')
+    thumbnail.add_header('Content-ID', '<thumbnail>')
+    thumbnail.add_header('Content-Disposition', 'inline', filename="thumbnail.jpg")
+    message.attach(thumbnail)
+    return message
+
+def send_to_clinician(artifact, class_name, conf_score, selected_facility, client_code, image_link=None, expires_hours=None):
+    """Send image and details to clinician via email, linking to the stored image when image_link is given"""
     subject = "Diagnosis Escalation"
-    body = f"URGENT REVIEW NEEDED\nFacility: {selected_facility}\nClient Code: {client_code}\nDiagnosis: {class_name}\nConfidence Score: {conf_score:.2%}\nPlease review the attached image."
+    details = f"URGENT REVIEW NEEDED\nFacility: {selected_facility}\nClient Code: {client_code}\nDiagnosis: {class_name}\nConfidence Score: {conf_score:.2%}"
     
     sender_email = os.getenv('SENDER_EMAIL')
     recipient_email = os.getenv('RECIPIENT_EMAIL')
@@ -19,21 +52,13 @@ def send_to_clinician(image, class_name, conf_score, selected_facility, client_c
     smtp_server = 'smtp.gmail.com'
     smtp_port = 587
     
-    temp_path = "temp_image.jpg"
-    image.save(temp_path)
-
-    message = MIMEMultipart()
+    if image_link:
+        message = build_link_message(artifact, details, image_link, expires_hours)
+    else:
+        message = build_attachment_message(artifact, details)
     message['Subject'] = subject
     message['From'] = sender_email
     message['To'] = recipient_email
-
-    body_part = MIMEText(body)
-    message.attach(body_part)
-
-    with open(temp_path, 'rb') as file:
-        attachment = MIMEApplication(file.read(), Name="Image.jpg")
-        attachment['Content-Disposition'] = 'attachment; filename="Image.jpg"'
-        message.attach(attachment)
     
     try:
         with smtplib.SMTP(smtp_server, smtp_port) as server:
@@ -46,7 +71,4 @@ def send_to_clinician(image, class_name, conf_score, selected_facility, client_c
         success = False
         logger.error(f"Error sending to clinician: {e}", exc_info=True)
     
-    if os.path.exists(temp_path):
-        os.remove(temp_path)
-    
     return success
\ No newline at end of file
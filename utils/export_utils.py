@@ -0,0 +1,77 @@
+import csv
+import io
+import tempfile
+from datetime import timedelta
+from supabase import Client
+
+EXPORT_COLUMNS = ["id", "created_at", "facility", "client_code", "diagnosis", "confidence_score", "image_url"]
+
+def iter_screening_pages(supabase: Client, facility=None, start_date=None, end_date=None, page_size=1000, after_id=None, columns=EXPORT_COLUMNS):
+    """Yield pages of screening rows ordered by id using keyset pagination"""
+    last_id = after_id
+    while True:
+        query = supabase.table("screenings").select(",".join(columns))
+        if facility:
+            query = query.eq("facility", facility)
+        if start_date:
+            query = query.gte("created_at", start_date.isoformat())
+        if end_date:
+            query = query.lt("created_at", (end_date + timedelta(days=1)).isoformat())
+        if last_id is not None:
+            query = query.gt("id", last_id)
+
+        rows = query.order("id").limit(page_size).execute().data
+        if not rows:
+            return
+        yield rows
+        if len(rows) < page_size:
+            return
+        last_id = rows[-1]["id"]
+
+def write_csv(pages, out):
+    """Stream pages of rows into a binary file object as UTF-8 CSV"""
+    text = io.TextIOWrapper(out, encoding="utf-8", newline="", write_through=True)
+    writer = csv.DictWriter(text, fieldnames=EXPORT_COLUMNS, extrasaction="ignore")
+    writer.writeheader()
+    count = 0
+    for rows in pages:
+        writer.writerows(rows)
+        count += len(rows)
+    text.detach()
+    return count
+
+def write_parquet(pages, out):
+    """Stream pages of rows into a binary file object as Parquet, one row group per page"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ("id", pa.int64()),
+        ("created_at", pa.string()),
+        ("facility", pa.string()),
+        ("client_code", pa.string()),
+        ("diagnosis", pa.string()),
+        ("confidence_score", pa.float64()),
+        ("image_url", pa.string()),
+    ])
+    count = 0
+    with pq.ParquetWriter(out, schema) as writer:
+        for rows in pages:
+            writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+            count += len(rows)
+    return count
+
+def export_screenings(supabase: Client, fmt="csv", facility=None, start_date=None, end_date=None):
+    """Export screening records through a temporary file and return its bytes with the row count.
+
+    Pages are written to disk as they arrive so only the finished file is
+    held in memory, as bytes, which is what st.download_button accepts.
+    """
+    with tempfile.TemporaryFile() as out:
+        pages = iter_screening_pages(supabase, facility, start_date, end_date)
+        if fmt == "parquet":
+            count = write_parquet(pages, out)
+        else:
+            count = write_csv(pages, out)
+        out.seek(0)
+        return out.read(), count
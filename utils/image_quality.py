@@ -0,0 +1,55 @@
+import os
+import cv2
+import numpy as np
+
+# Metrics are computed on a copy downscaled to this long side, so blur
+# thresholds are independent of the camera resolution and checks stay cheap.
+ANALYSIS_SIDE = 512
+
+def _threshold(name, default):
+    return float(os.getenv(name, default))
+
+def assess_image_quality(array):
+    """Run cheap quality checks on an RGB array before inference.
+
+    Returns a dict with `rejected` (the image should be retaken, not screened),
+    `reasons` for rejection, `flags` for issues worth recording but not
+    blocking, and the raw `metrics`.
+    """
+    height, width = array.shape[:2]
+    scale = ANALYSIS_SIDE / max(height, width)
+    small = cv2.resize(array, (max(1, round(width * scale)), max(1, round(height * scale))), interpolation=cv2.INTER_AREA) if scale < 1 else array
+    gray = cv2.cvtColor(small, cv2.COLOR_RGB2GRAY)
+
+    histogram = np.bincount(gray.ravel(), minlength=256)
+    metrics = {
+        "width": width,
+        "height": height,
+        "aspect_ratio": max(width, height) / max(1, min(width, height)),
+        "blur_variance": float(cv2.Laplacian(gray, cv2.CV_64F).var()),
+        "brightness": float(gray.mean()),
+        "underexposed_fraction": float(histogram[:16].sum() / gray.size),
+        "overexposed_fraction": float(histogram[240:].sum() / gray.size),
+        "red_dominance": float(small[..., 0].mean() - small[..., 1].mean()),
+    }
+
+    reasons = []
+    flags = []
+    if min(width, height) < _threshold("QUALITY_MIN_SIDE", 224):
+        reasons.append(f"Resolution too low ({width}x{height})")
+    if metrics["aspect_ratio"] > _threshold("QUALITY_MAX_ASPECT", 2.5):
+        reasons.append("Unusual aspect ratio")
+    if metrics["blur_variance"] < _threshold("QUALITY_BLUR_REJECT", 15):
+        reasons.append("Image is too blurred")
+    elif metrics["blur_variance"] < _threshold("QUALITY_BLUR_FLAG", 60):
+        flags.append("Image is slightly blurred")
+    if metrics["overexposed_fraction"] > _threshold("QUALITY_MAX_CLIPPED", 0.4):
+        reasons.append("Image is over-exposed")
+    elif metrics["underexposed_fraction"] > _threshold("QUALITY_MAX_CLIPPED", 0.4):
+        reasons.append("Image is under-exposed")
+    elif not _threshold("QUALITY_MIN_BRIGHTNESS", 40) <= metrics["brightness"] <= _threshold("QUALITY_MAX_BRIGHTNESS", 220):
+        flags.append("Exposure is outside the usual range")
+    if metrics["red_dominance"] < _threshold("QUALITY_MIN_RED_DOMINANCE", 10):
+        flags.append("Image may not be a cervigram")
+
+    return {"rejected": bool(reasons), "reasons": reasons, "flags": flags, "metrics": metrics}
@@ -0,0 +1,93 @@
+import io
+import json
+import os
+import httpx
+from utils.inference_gate import InferenceBusyError
+
+class RemoteModel:
+    """Client for a shared inference server started with inference_server.py.
+
+    Lets several app workers use one process that holds the model weights
+    instead of each loading its own copy.
+    """
+
+    def __init__(self, url, timeout=None):
+        self.url = url.rstrip("/")
+        timeout = timeout or float(os.getenv("INFERENCE_TIMEOUT", 60))
+        self.client = httpx.Client(timeout=timeout)
+
+    def classify(self, image, tta=None, on_wait=None, data=None):
+        """Send the encoded upload bytes (or the image as PNG when data isn't given) and return the class name and confidence score.
+
+        With on_wait, the server streams the request's queue position while it
+        waits for an inference slot and on_wait(position) is called for each.
+        """
+        if data is None:
+            buffer = io.BytesIO()
+            image.convert("RGB").save(buffer, format="PNG")
+            data = buffer.getvalue()
+        headers = {"Content-Type": "application/octet-stream"}
+        if tta is not None:
+            headers["X-TTA"] = "true" if tta else "false"
+        if on_wait is not None:
+            return self._classify_with_updates(data, headers, on_wait)
+
+        response = self.client.post(f"{self.url}/classify", content=data, headers=headers)
+        if response.status_code == 503:
+            raise InferenceBusyError(response.json()["error"])
+        response.raise_for_status()
+        result = response.json()
+        return result["class_name"], result["conf_score"]
+
+    def _classify_with_updates(self, data, headers, on_wait):
+        headers = {**headers, "X-Queue-Updates": "true"}
+        with self.client.stream("POST", f"{self.url}/classify", content=data, headers=headers) as response:
+            if response.status_code >= 400:
+                response.read()
+                raise ValueError(response.json().get("error", response.text))
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                message = json.loads(line)
+                if "position" in message:
+                    on_wait(message["position"])
+                elif message.get("busy"):
+                    raise InferenceBusyError(message["error"])
+                elif "error" in message:
+                    raise ValueError(message["error"])
+                else:
+                    return message["class_name"], message["conf_score"]
+        raise ValueError("The inference server closed the connection without a result")
+
+    def saliency(self, artifact, class_name):
+        """Have the inference server render the Grad-CAM JPEG for the artifact's upload bytes"""
+        headers = {"Content-Type": "application/octet-stream", "X-Class-Name": class_name, "X-Image-Name": artifact.name}
+        # rendering waits for a free inference slot, so allow longer than a classification
+        timeout = float(os.getenv("SALIENCY_TIMEOUT", 300))
+        response = self.client.post(f"{self.url}/saliency", content=artifact.data, headers=headers, timeout=timeout)
+        if response.status_code >= 400:
+            raise ValueError(response.json().get("error", response.text))
+        return response.content
+
+    def _post(self, path, payload=None):
+        response = self.client.post(f"{self.url}{path}", json=payload or {})
+        if response.status_code >= 400:
+            raise ValueError(response.json().get("error", response.text))
+        return response.json()
+
+    def load_candidate(self, model_path):
+        self._post("/model/candidate", {"path": model_path})
+
+    def promote(self):
+        self._post("/model/promote")
+
+    def discard_candidate(self):
+        self._post("/model/discard")
+
+    def set_shadow_fraction(self, fraction):
+        self._post("/model/shadow", {"fraction": fraction})
+
+    def status(self):
+        response = self.client.get(f"{self.url}/model/status")
+        response.raise_for_status()
+        return response.json()
@@ -0,0 +1,115 @@
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+class InferenceBusyError(Exception):
+    """Raised when a request waits longer than the gate allows for a free inference slot"""
+
+class InferenceGate:
+    """Caps concurrent forward passes and queues the rest in arrival order"""
+
+    def __init__(self, max_concurrent, max_wait):
+        self.max_concurrent = max_concurrent
+        self.max_wait = max_wait
+        self._cond = threading.Condition()
+        self._active = 0
+        self._queue = deque()
+
+    def _ready(self, ticket):
+        return self._active < self.max_concurrent and self._queue[0] is ticket
+
+    def acquire(self, on_wait=None):
+        """Wait for a slot, calling on_wait(position) while queued, or raise InferenceBusyError"""
+        ticket = object()
+        deadline = time.monotonic() + self.max_wait
+        with self._cond:
+            self._queue.append(ticket)
+        try:
+            while True:
+                with self._cond:
+                    if self._ready(ticket):
+                        self._queue.popleft()
+                        self._active += 1
+                        return
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise InferenceBusyError(
+                            "The screening model is busy. Please try again in a minute."
+                        )
+                    position = self._queue.index(ticket) + 1
+                if on_wait:
+                    # outside the lock: the callback writes to a socket or redraws the page
+                    on_wait(position)
+                with self._cond:
+                    if not self._ready(ticket):
+                        self._cond.wait(min(max(deadline - time.monotonic(), 0), 0.5))
+        except BaseException:
+            with self._cond:
+                self._queue.remove(ticket)
+                self._cond.notify_all()
+            raise
+
+    def try_acquire(self):
+        """Take a slot only if one is free and nobody is queued"""
+        with self._cond:
+            if self._queue or self._active >= self.max_concurrent:
+                return False
+            self._active += 1
+            return True
+
+    def acquire_idle(self):
+        """Wait, with no deadline, until a slot is free and nobody is queued, then take it.
+
+        For background work that must never hold up a screening.
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: not self._queue and self._active < self.max_concurrent)
+            self._active += 1
+
+    def release(self):
+        with self._cond:
+            self._active -= 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, on_wait=None):
+        self.acquire(on_wait)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self):
+        with self._cond:
+            return {"active": self._active, "waiting": len(self._queue), "max_concurrent": self.max_concurrent}
+
+_gate = None
+_gate_lock = threading.Lock()
+
+def get_gate():
+    """Return the process-wide inference gate, configured from the environment on first use"""
+    global _gate
+    with _gate_lock:
+        if _gate is None:
+            # every session shares one YOLO object whose predictor runs one
+            # forward pass at a time, so extra slots only help shadow and
+            # saliency runs, which use their own model copies
+            _gate = InferenceGate(
+                max_concurrent=int(os.getenv("INFERENCE_MAX_CONCURRENCY", 1)),
+                max_wait=float(os.getenv("INFERENCE_MAX_WAIT", 30)),
+            )
+        return _gate
+
+def configure_torch_threads():
+    """Split CPU cores between inference slots; with the default single slot each forward pass gets every core"""
+    import torch
+
+    threads = max(1, (os.cpu_count() or 1) // get_gate().max_concurrent)
+    torch.set_num_threads(int(os.getenv("TORCH_NUM_THREADS", threads)))
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # inter-op threads can only be set before torch starts parallel work
+        pass
@@ -0,0 +1,150 @@
+import logging
+import os
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import streamlit as st
+from utils.inference_client import RemoteModel
+from utils.inference_gate import get_gate
+from utils.saliency import render_saliency
+from utils.tools import classify, load_yolo, predict_class
+
+logger = logging.getLogger(__name__)
+
+# Shadow comparisons waiting beyond this are dropped rather than queued
+MAX_PENDING_SHADOW = 4
+
+class ModelManager:
+    """Holds the live model and an optional candidate for zero-downtime swaps.
+
+    Requests take a reference to the live model when they start, so promote()
+    only redirects new requests and in-flight ones finish on the model they
+    began with. A loaded candidate can shadow a sampled fraction of live
+    traffic on a background thread, only when an inference slot is free.
+    """
+
+    def __init__(self, model, model_path):
+        self._lock = threading.Lock()
+        self.live = model
+        self.live_path = model_path
+        self.candidate = None
+        self.candidate_path = None
+        self.shadow_fraction = 0.0
+        self._shadow_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shadow")
+        self._shadow_pending = 0
+        self._reset_shadow_stats()
+        # Grad-CAM hooks and gradients run on a separate copy of the live
+        # model, loaded on first use and shared by every saliency request
+        self._saliency_lock = threading.Lock()
+        self._saliency_model = None
+        self._saliency_path = None
+
+    def _reset_shadow_stats(self):
+        self.shadow_stats = {"compared": 0, "agreed": 0, "skipped": 0, "confidence_delta": 0.0}
+
+    def classify(self, image, tta=None, on_wait=None, data=None):
+        """Classify with the live model; data is only used by RemoteModel"""
+        live = self.live
+        class_name, conf_score = classify(image, live, tta, on_wait)
+
+        candidate = self.candidate
+        if candidate is not None and random.random() < self.shadow_fraction:
+            self._submit_shadow(image, candidate, class_name, conf_score)
+        return class_name, conf_score
+
+    def _submit_shadow(self, image, candidate, class_name, conf_score):
+        with self._lock:
+            if self._shadow_pending >= MAX_PENDING_SHADOW:
+                self.shadow_stats["skipped"] += 1
+                return
+            self._shadow_pending += 1
+        self._shadow_pool.submit(self._run_shadow, image, candidate, class_name, conf_score)
+
+    def _run_shadow(self, image, candidate, class_name, conf_score):
+        try:
+            gate = get_gate()
+            # never take a slot a live request could be waiting for
+            if not gate.try_acquire():
+                with self._lock:
+                    self.shadow_stats["skipped"] += 1
+                return
+            try:
+                shadow_class, shadow_conf = predict_class(image, candidate, save=False, record_latency=False)
+            finally:
+                gate.release()
+
+            agreed = shadow_class == class_name
+            with self._lock:
+                if candidate is not self.candidate:
+                    return
+                self.shadow_stats["compared"] += 1
+                self.shadow_stats["agreed"] += int(agreed)
+                self.shadow_stats["confidence_delta"] += shadow_conf - conf_score
+            logger.info(
+                f"Shadow {'agreed' if agreed else 'disagreed'}: live {class_name} ({conf_score:.2%}), "
+                f"candidate {shadow_class} ({shadow_conf:.2%})"
+            )
+        except Exception as e:
+            logger.error(f"Shadow evaluation failed: {e}", exc_info=True)
+        finally:
+            with self._lock:
+                self._shadow_pending -= 1
+
+    def saliency(self, artifact, class_name):
+        """Grad-CAM JPEG for class_name from the saliency copy of the live model, reloaded after a promotion"""
+        image = artifact.image()
+        live_path = self.live_path
+        with self._saliency_lock:
+            if self._saliency_path != live_path:
+                self._saliency_model = load_yolo(live_path)
+                self._saliency_path = live_path
+            return render_saliency(self._saliency_model, image, class_name)
+
+    def load_candidate(self, model_path):
+        """Load a candidate model next to the live one"""
+        model = load_yolo(model_path)
+        with self._lock:
+            self.candidate = model
+            self.candidate_path = model_path
+            self._reset_shadow_stats()
+
+    def promote(self):
+        """Atomically make the candidate the live model"""
+        with self._lock:
+            if self.candidate is None:
+                raise ValueError("No candidate model is loaded")
+            self.live, self.live_path = self.candidate, self.candidate_path
+            self.candidate = self.candidate_path = None
+            self.shadow_fraction = 0.0
+            self._reset_shadow_stats()
+        logger.info(f"Promoted {self.live_path} to live model")
+
+    def discard_candidate(self):
+        with self._lock:
+            self.candidate = self.candidate_path = None
+            self.shadow_fraction = 0.0
+
+    def set_shadow_fraction(self, fraction):
+        self.shadow_fraction = min(max(float(fraction), 0.0), 1.0)
+
+    def status(self):
+        with self._lock:
+            stats = dict(self.shadow_stats)
+            return {
+                "live_path": self.live_path,
+                "candidate_path": self.candidate_path,
+                "shadow_fraction": self.shadow_fraction,
+                "shadow_compared": stats["compared"],
+                "shadow_agreement": stats["agreed"] / stats["compared"] if stats["compared"] else None,
+                "shadow_mean_confidence_delta": stats["confidence_delta"] / stats["compared"] if stats["compared"] else None,
+                "shadow_skipped": stats["skipped"],
+            }
+
+@st.cache_resource
+def load_model():
+    """Return the model shared by all sessions: the inference server client if INFERENCE_URL is set, else a local ModelManager"""
+    inference_url = os.getenv("INFERENCE_URL")
+    if inference_url:
+        return RemoteModel(inference_url)
+    model_path = os.getenv("MODEL_PATH", "./model/best.pt")
+    return ModelManager(load_yolo(model_path), model_path)
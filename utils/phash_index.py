@@ -0,0 +1,183 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+import cv2
+import numpy as np
+import streamlit as st
+
+SCHEMA = """
+create table if not exists phashes (
+    id integer primary key,
+    phash text not null,
+    image_hash text not null,
+    facility text,
+    class_name text,
+    conf_score real,
+    created_at text,
+    escalated integer not null default 0,
+    thumbnail blob
+);
+create index if not exists phashes_created_at_idx on phashes (created_at);
+"""
+
+# Expired rows and their thumbnails are dropped at most this often while screenings are added
+PRUNE_INTERVAL = timedelta(hours=1)
+
+def perceptual_hash(array):
+    """64-bit DCT perceptual hash of an RGB array, stable under resizing and recompression"""
+    gray = cv2.cvtColor(array, cv2.COLOR_RGB2GRAY)
+    small = cv2.resize(gray, (32, 32), interpolation=cv2.INTER_AREA).astype(np.float32)
+    low = cv2.dct(small)[:8, :8].flatten()
+    # the DC term only carries overall brightness
+    bits = low > np.median(low[1:])
+    return int("".join("1" if bit else "0" for bit in bits), 2)
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+class BKTree:
+    """Metric tree over Hamming distance for finding hashes within a radius"""
+
+    def __init__(self):
+        # node: [hash, values, {distance: child}]
+        self.root = None
+
+    def add(self, key, value):
+        if self.root is None:
+            self.root = [key, [value], {}]
+            return
+        node = self.root
+        while True:
+            distance = hamming(key, node[0])
+            if distance == 0:
+                node[1].append(value)
+                return
+            if distance not in node[2]:
+                node[2][distance] = [key, [value], {}]
+                return
+            node = node[2][distance]
+
+    def search(self, key, max_distance):
+        """Return (distance, value) pairs for every stored hash within max_distance of key"""
+        found = []
+        stack = [self.root] if self.root else []
+        while stack:
+            node = stack.pop()
+            distance = hamming(key, node[0])
+            if distance <= max_distance:
+                found.extend((distance, value) for value in node[1])
+            stack.extend(child for d, child in node[2].items() if distance - max_distance <= d <= distance + max_distance)
+        return found
+
+class PerceptualHashIndex:
+    """Recently screened images by perceptual hash, for spotting retakes and resized re-uploads.
+
+    Results are persisted in SQLite, with a thumbnail so a clinician can
+    compare a match before reusing it, and indexed in memory with one
+    BK-tree per facility, so duplicates are only matched within the facility
+    that took them. Rows added by other workers sharing the file are picked up by id
+    before each lookup. Rows older than max_age are deleted at startup and
+    then at most every PRUNE_INTERVAL from add(), rebuilding the trees
+    without them.
+    """
+
+    def __init__(self, path, max_distance, max_age):
+        self.path = path
+        self.max_distance = max_distance
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._trees = {}
+        self._records = {}
+        self._last_id = 0
+        self._pruned_at = None
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            columns = {row["name"] for row in conn.execute("pragma table_info(phashes)")}
+            if "thumbnail" not in columns:
+                conn.execute("alter table phashes add column thumbnail blob")
+        self._prune()
+        self._load_new()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _load_new(self):
+        with self._connect() as conn:
+            # thumbnails stay on disk until a lookup needs one
+            rows = conn.execute(
+                "select id, phash, image_hash, facility, class_name, conf_score, created_at, escalated from phashes where id > ? order by id",
+                (self._last_id,),
+            ).fetchall()
+        for row in rows:
+            record = dict(row)
+            self._records[record["id"]] = record
+            self._trees.setdefault(record["facility"], BKTree()).add(int(record["phash"], 16), record["id"])
+            self._last_id = record["id"]
+
+    def _prune(self):
+        """Delete expired rows and rebuild the trees from what is left; callers hold the lock"""
+        now = datetime.now()
+        cutoff = (now - self.max_age).isoformat()
+        with self._connect() as conn:
+            conn.execute("delete from phashes where created_at < ?", (cutoff,))
+        self._records = {record_id: record for record_id, record in self._records.items() if record["created_at"] >= cutoff}
+        self._trees = {}
+        for record in self._records.values():
+            self._trees.setdefault(record["facility"], BKTree()).add(int(record["phash"], 16), record["id"])
+        self._pruned_at = now
+
+    def lookup(self, phash, facility):
+        """Return the closest recent screening at facility within max_distance, or None"""
+        cutoff = (datetime.now() - self.max_age).isoformat()
+        with self._lock:
+            self._load_new()
+            tree = self._trees.get(facility)
+            matches = tree.search(phash, self.max_distance) if tree else []
+            matches = [(distance, self._records[record_id]) for distance, record_id in matches]
+        matches = [(distance, record) for distance, record in matches if record["created_at"] >= cutoff]
+        if not matches:
+            return None
+        distance, record = min(matches, key=lambda match: (match[0], -match[1]["id"]))
+        # another worker may have escalated it since it was loaded
+        with self._connect() as conn:
+            stored = conn.execute("select escalated, thumbnail from phashes where id = ?", (record["id"],)).fetchone()
+        return {
+            **record,
+            "escalated": stored["escalated"] if stored else record["escalated"],
+            "thumbnail": stored["thumbnail"] if stored else None,
+            "distance": distance,
+        }
+
+    def add(self, phash, image_hash, facility, class_name, conf_score, thumbnail=None):
+        """Record a screening result and return its id"""
+        with self._lock:
+            with self._connect() as conn:
+                record_id = conn.execute(
+                    "insert into phashes (phash, image_hash, facility, class_name, conf_score, created_at, thumbnail) values (?, ?, ?, ?, ?, ?, ?)",
+                    (f"{phash:016x}", image_hash, facility, class_name, conf_score, datetime.now().isoformat(), thumbnail),
+                ).lastrowid
+            self._load_new()
+            if datetime.now() - self._pruned_at >= PRUNE_INTERVAL:
+                self._prune()
+            return record_id
+
+    def mark_escalated(self, record_id):
+        """Note that the screening was escalated so near-duplicates aren't escalated again"""
+        with self._lock:
+            with self._connect() as conn:
+                conn.execute("update phashes set escalated = 1 where id = ?", (record_id,))
+            if record_id in self._records:
+                self._records[record_id]["escalated"] = 1
+
+@st.cache_resource
+def get_phash_index():
+    """Return the process-wide index configured by PHASH_DB_PATH, PHASH_MAX_DISTANCE and PHASH_MAX_AGE_HOURS"""
+    return PerceptualHashIndex(
+        os.getenv("PHASH_DB_PATH", "./data/phash_index.sqlite"),
+        int(os.getenv("PHASH_MAX_DISTANCE", 6)),
+        timedelta(hours=float(os.getenv("PHASH_MAX_AGE_HOURS", 24))),
+    )
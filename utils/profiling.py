@@ -0,0 +1,128 @@
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from datetime import datetime
+
+class SamplingProfiler:
+    """On-demand sampling profiler for the whole app process.
+
+    While running, a background thread snapshots every thread's stack at a
+    fixed interval and counts them in folded-stack format, which flamegraph.pl
+    and speedscope read directly. It stops after a duration or after a number
+    of tracked requests. When idle, track() only checks a flag.
+    """
+
+    def __init__(self, interval=0.01, keep=5):
+        self.interval = interval
+        self.captures = deque(maxlen=keep)
+        self._lock = threading.Lock()
+        self._active = False
+        self._stop = threading.Event()
+
+    @property
+    def active(self):
+        return self._active
+
+    def start(self, seconds=None, requests=None):
+        """Start sampling until `seconds` elapse or `requests` tracked requests finish"""
+        with self._lock:
+            if self._active:
+                raise RuntimeError("Profiling is already running")
+            self._active = True
+            self._stop.clear()
+            self._stacks = Counter()
+            self._requests = []
+            self._samples = 0
+            self._started = time.time()
+            self._deadline = self._started + seconds if seconds else None
+            self._requests_left = requests
+        threading.Thread(target=self._run, name="profiler", daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+
+    def status(self):
+        with self._lock:
+            if not self._active:
+                return {"active": False}
+            return {
+                "active": True,
+                "elapsed": time.time() - self._started,
+                "samples": self._samples,
+                "requests": len(self._requests),
+                "requests_left": self._requests_left,
+                "seconds_left": max(0.0, self._deadline - time.time()) if self._deadline else None,
+            }
+
+    @contextmanager
+    def track(self, name):
+        """Mark a request path so request-count mode knows when to stop and captures include timings"""
+        if not self._active:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                if self._active:
+                    self._requests.append((name, elapsed))
+                    if self._requests_left is not None:
+                        self._requests_left -= 1
+                        if self._requests_left <= 0:
+                            self._stop.set()
+
+    def _sample(self, own_id):
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+                frame = frame.f_back
+            stack.append(names.get(thread_id, str(thread_id)))
+            self._stacks[";".join(reversed(stack))] += 1
+        self._samples += 1
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.is_set():
+            if self._deadline and time.time() >= self._deadline:
+                break
+            with self._lock:
+                self._sample(own_id)
+            time.sleep(self.interval)
+        with self._lock:
+            self.captures.appendleft(self._build_capture())
+            self._active = False
+
+    def _build_capture(self):
+        folded = "\n".join(f"{stack} {count}" for stack, count in self._stacks.most_common())
+        # self time: leaf frame of each sampled stack
+        leaves = Counter()
+        for stack, count in self._stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        total = sum(leaves.values()) or 1
+        lines = [
+            f"Samples: {self._samples} over {time.time() - self._started:.1f}s at {self.interval * 1000:.0f}ms",
+            "",
+            "Top functions by self samples:",
+        ]
+        lines += [f"{count / total:7.2%}  {frame}" for frame, count in leaves.most_common(40)]
+        if self._requests:
+            lines += ["", "Tracked requests:"]
+            lines += [f"{elapsed * 1000:9.1f} ms  {name}" for name, elapsed in self._requests]
+        return {
+            "started": datetime.fromtimestamp(self._started),
+            "samples": self._samples,
+            "requests": len(self._requests),
+            "folded": folded,
+            "summary": "\n".join(lines),
+        }
+
+profiler = SamplingProfiler()
@@ -0,0 +1,115 @@
+import logging
+import threading
+from datetime import datetime, timezone
+from supabase import Client
+
+logger = logging.getLogger(__name__)
+
+QUEUE_COLUMNS = ["id", "created_at", "facility", "client_code", "diagnosis", "confidence_score", "image_url", "saliency_url", "quality_flags", "status", "claimed_by", "claimed_at"]
+OPEN_STATUSES = ["pending", "claimed"]
+
+class ReviewQueue:
+    """Open escalations held in memory and kept current by change events.
+
+    The queue is loaded once, then every insert or update to screenings is
+    applied as it arrives, either from Supabase Realtime or from escalations
+    made in this process. Pages render from memory and check version to
+    see whether anything changed, so reviewers never refetch the table.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._items = {}
+        self.version = 0
+        self.loaded = False
+        self.needs_reload = False
+        self.realtime_status = None
+        self.truncated = False
+
+    def load(self, supabase: Client, limit=500):
+        """Replace the queue with the newest `limit` open escalations, noting whether older ones were left out"""
+        rows = (
+            supabase.table("screenings").select(",".join(QUEUE_COLUMNS))
+            .in_("status", OPEN_STATUSES).order("created_at", desc=True).limit(limit + 1).execute().data
+        )
+        with self._lock:
+            self._items = {row["id"]: row for row in rows[:limit]}
+            self.truncated = len(rows) > limit
+            self.loaded = True
+            self.needs_reload = False
+            self.version += 1
+
+    def apply(self, row):
+        """Apply an inserted or updated screening row, dropping it once resolved"""
+        if not row or row.get("id") is None:
+            return
+        with self._lock:
+            if row.get("status") in OPEN_STATUSES:
+                self._items[row["id"]] = {**self._items.get(row["id"], {}), **{c: row[c] for c in QUEUE_COLUMNS if c in row}}
+            elif self._items.pop(row["id"], None) is None:
+                return
+            self.version += 1
+
+    def publish(self, rows):
+        """Apply screenings written in this process without waiting for the realtime echo"""
+        for row in rows or []:
+            self.apply(row)
+
+    def on_change(self, payload):
+        """Realtime postgres_changes callback"""
+        data = payload.get("data", {})
+        if data.get("type") == "DELETE":
+            with self._lock:
+                if self._items.pop((data.get("old_record") or {}).get("id"), None) is not None:
+                    self.version += 1
+        else:
+            self.apply(data.get("record"))
+
+    def on_status(self, status, error=None):
+        """Realtime subscription callback; after a reconnect the queue is reloaded to cover missed events"""
+        status = getattr(status, "value", status)
+        if error:
+            logger.error(f"Review queue realtime channel {status}: {error}")
+        if status == "SUBSCRIBED" and self.realtime_status is not None:
+            self.needs_reload = True
+        self.realtime_status = status
+
+    def items(self, facility=None):
+        """Open escalations, oldest first"""
+        with self._lock:
+            rows = list(self._items.values())
+        if facility:
+            rows = [row for row in rows if row.get("facility") == facility]
+        return sorted(rows, key=lambda row: (row.get("created_at") or "", row["id"]))
+
+review_queue = ReviewQueue()
+
+def claim_screening(supabase: Client, screening_id, user_id):
+    """Claim a pending escalation, returning False if another reviewer got to it first"""
+    rows = (
+        supabase.table("screenings")
+        .update({"status": "claimed", "claimed_by": user_id, "claimed_at": datetime.now(timezone.utc).isoformat()})
+        .eq("id", screening_id).eq("status", "pending").execute().data
+    )
+    review_queue.publish(rows)
+    return bool(rows)
+
+def release_screening(supabase: Client, screening_id, user_id):
+    """Put a claimed escalation back in the queue"""
+    rows = (
+        supabase.table("screenings")
+        .update({"status": "pending", "claimed_by": None, "claimed_at": None})
+        .eq("id", screening_id).eq("status", "claimed").eq("claimed_by", user_id).execute().data
+    )
+    review_queue.publish(rows)
+    return bool(rows)
+
+def resolve_screening(supabase: Client, screening_id, user_id, notes=None):
+    """Resolve an escalation claimed by user_id"""
+    rows = (
+        supabase.table("screenings")
+        .update({"status": "resolved", "resolved_at": datetime.now(timezone.utc).isoformat(), "review_notes": notes or None})
+        .eq("id", screening_id).eq("status", "claimed").eq("claimed_by", user_id).execute().data
+    )
+    review_queue.publish(rows)
+    return bool(rows)
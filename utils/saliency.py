@@ -0,0 +1,92 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+import numpy as np
+from utils.inference_gate import get_gate
+from utils.supabase_utils import BUCKET_NAME
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=int(os.getenv("SALIENCY_WORKERS", 1)), thread_name_prefix="saliency")
+        return _pool
+
+def saliency_storage_path(image_hash):
+    """Heatmaps are stored beside the screening image under the same content hash"""
+    return f"{image_hash}_cam.jpg"
+
+def compute_gradcam(model, image, class_name, imgsz=640):
+    """Return a JPEG of the Grad-CAM heatmap for class_name overlaid on the model's view of the image"""
+    import torch
+
+    # same view the classifier sees: shortest side resized to imgsz, centre crop
+    array = np.asarray(image.convert("RGB"))
+    height, width = array.shape[:2]
+    scale = imgsz / min(height, width)
+    resized = cv2.resize(array, (max(imgsz, round(width * scale)), max(imgsz, round(height * scale))), interpolation=cv2.INTER_AREA)
+    top = (resized.shape[0] - imgsz) // 2
+    left = (resized.shape[1] - imgsz) // 2
+    crop = np.ascontiguousarray(resized[top:top + imgsz, left:left + imgsz])
+
+    network = model.model.eval()
+    device = next(network.parameters()).device
+    x = torch.from_numpy(crop).permute(2, 0, 1).float().div(255).unsqueeze(0).to(device)
+    x.requires_grad_(True)
+
+    activations = {}
+    head = network.model[-1]
+    handle = head.conv.register_forward_hook(lambda module, inputs, output: activations.update(features=output))
+    try:
+        with torch.enable_grad():
+            output = network(x)
+            logits = output[1] if isinstance(output, tuple) else output
+            class_idx = {name: idx for idx, name in model.names.items()}[class_name]
+            features = activations["features"]
+            gradients, = torch.autograd.grad(logits[0, class_idx], features)
+    finally:
+        handle.remove()
+
+    weights = gradients.mean(dim=(2, 3), keepdim=True)
+    cam = torch.relu((weights * features).sum(dim=1))[0].detach().cpu().numpy()
+    cam = cam / cam.max() if cam.max() > 0 else cam
+    cam = cv2.resize(cam, (imgsz, imgsz), interpolation=cv2.INTER_LINEAR)
+
+    heatmap = cv2.applyColorMap(np.uint8(255 * cam), cv2.COLORMAP_JET)
+    overlay = cv2.addWeighted(cv2.cvtColor(crop, cv2.COLOR_RGB2BGR), 0.6, heatmap, 0.4, 0)
+    _, encoded = cv2.imencode(".jpg", overlay, [cv2.IMWRITE_JPEG_QUALITY, 85])
+    return encoded.tobytes()
+
+def render_saliency(model, image, class_name):
+    """Grad-CAM JPEG from model, waiting until no screening needs the inference slot"""
+    gate = get_gate()
+    gate.acquire_idle()
+    try:
+        return compute_gradcam(model, image, class_name)
+    finally:
+        gate.release()
+
+def _generate(supabase, artifact, class_name, model):
+    try:
+        jpeg = model.saliency(artifact, class_name)
+        file_path = saliency_storage_path(artifact.image_hash)
+        bucket = supabase.storage.from_(BUCKET_NAME)
+        bucket.upload(file_path, jpeg, file_options={"content-type": "image/jpeg", "upsert": "true"})
+        supabase.table("screenings").update({"saliency_url": bucket.get_public_url(file_path)}).eq("image_hash", artifact.image_hash).execute()
+    except Exception as e:
+        logger.error(f"Error generating saliency map for {artifact.image_hash}: {e}", exc_info=True)
+
+def submit_saliency(supabase, artifact, class_name, model):
+    """Queue a Grad-CAM heatmap for an escalated screening on the background pool.
+
+    The heatmap comes from model.saliency(), so with a RemoteModel it is
+    rendered by the inference server rather than in this worker.
+    """
+    return _get_pool().submit(_generate, supabase, artifact, class_name, model)
@@ -0,0 +1,93 @@
+import io
+import numpy as np
+from PIL import Image
+from utils.supabase_utils import image_content_hash, MIME_TYPE_MAP
+
+THUMBNAIL_SIZE = (256, 256)
+
+class ScreeningArtifact:
+    """An uploaded screening image, decoded and encoded once for every consumer.
+
+    Holds the original upload bytes (stored as-is in Supabase), the decoded RGB
+    array used for inference, and lazily a JPEG and thumbnail for email and
+    display. Call release() once inference is done to drop the decoded pixels.
+    Under memory pressure the session budget can release() or evict() it.
+    """
+
+    def __init__(self, data, name):
+        self.data = data
+        self.name = name
+        extension = name.split(".")[-1].lower()
+        self.extension = "jpg" if extension == "jpeg" else extension
+        self.mime_type = MIME_TYPE_MAP.get(self.extension, "application/octet-stream")
+        self.image_hash = image_content_hash(data)
+        self.array = np.asarray(Image.open(io.BytesIO(data)).convert("RGB"))
+        self._jpeg = None
+        self._thumbnail = None
+        self.evicted = False
+
+    @classmethod
+    def from_upload(cls, file):
+        return cls(file.getvalue(), file.name)
+
+    def image(self):
+        """Return the decoded image as PIL, sharing the array's memory"""
+        if self.evicted:
+            raise ValueError("Screening image was evicted from memory")
+        if self.array is None:
+            return Image.open(io.BytesIO(self.data)).convert("RGB")
+        return Image.fromarray(self.array)
+
+    def _encode_jpeg(self):
+        buffer = io.BytesIO()
+        self.image().save(buffer, format="JPEG", quality=90)
+        return buffer.getvalue()
+
+    def _encode_thumbnail(self):
+        image = self.image()
+        image.thumbnail(THUMBNAIL_SIZE)
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=80)
+        return buffer.getvalue()
+
+    @property
+    def jpeg(self):
+        """JPEG encoding of the image, computed on first use"""
+        if self._jpeg is None:
+            self._jpeg = self._encode_jpeg()
+        return self._jpeg
+
+    @property
+    def thumbnail(self):
+        """Small JPEG preview, computed on first use"""
+        if self._thumbnail is None:
+            self._thumbnail = self._encode_thumbnail()
+        return self._thumbnail
+
+    def encode_previews(self, jpeg=True):
+        """Encode the thumbnail, and the email JPEG unless jpeg is False, while the decoded pixels are at hand"""
+        if self._thumbnail is None:
+            self._thumbnail = self._encode_thumbnail()
+        if jpeg and self._jpeg is None:
+            self._jpeg = self._encode_jpeg()
+
+    def release(self, encode=False):
+        """Drop the decoded pixels, first encoding the JPEG and thumbnail if they will be needed"""
+        if encode and self.array is not None:
+            self.encode_previews()
+        self.array = None
+
+    def evict(self):
+        """Drop every buffer except the thumbnail; the image has to be uploaded again to be used"""
+        self.array = None
+        self._jpeg = None
+        self.data = b""
+        self.evicted = True
+
+    @property
+    def nbytes(self):
+        """Memory held by the artifact's buffers"""
+        total = len(self.data) + len(self._jpeg or b"") + len(self._thumbnail or b"")
+        if self.array is not None:
+            total += self.array.nbytes
+        return total
@@ -0,0 +1,156 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+import streamlit as st
+from supabase import Client
+from utils.export_utils import iter_screening_pages
+
+logger = logging.getLogger(__name__)
+
+MIRROR_COLUMNS = ["id", "created_at", "facility", "client_code", "diagnosis", "confidence_score", "image_url", "image_hash", "quality_flags", "saliency_url"]
+SORTABLE_COLUMNS = {"created_at", "facility", "client_code", "diagnosis", "confidence_score"}
+
+SCHEMA = """
+create table if not exists screenings (
+    id integer primary key,
+    created_at text,
+    facility text,
+    client_code text,
+    diagnosis text,
+    confidence_score real,
+    image_url text,
+    image_hash text,
+    quality_flags text,
+    saliency_url text
+);
+create index if not exists screenings_facility_idx on screenings (facility, created_at);
+create index if not exists screenings_created_at_idx on screenings (created_at);
+"""
+
+class ScreeningMirror:
+    """Local SQLite copy of the screenings table, synced incrementally by id.
+
+    Reviewer filters, sorting and aggregations run against the local copy, so
+    browsing records doesn't go over the network or load the production
+    database. Each sync only pulls rows with an id above the highest one
+    already mirrored, plus recent rows still waiting for their saliency map.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.last_sync = 0.0
+        self._sync_lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            columns = {row["name"] for row in conn.execute("pragma table_info(screenings)")}
+            if "saliency_url" not in columns:
+                conn.execute("alter table screenings add column saliency_url text")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def last_synced_id(self):
+        with self._connect() as conn:
+            return conn.execute("select max(id) from screenings").fetchone()[0]
+
+    def _upsert(self, rows):
+        with self._connect() as conn:
+            conn.executemany(
+                f"insert or replace into screenings ({', '.join(MIRROR_COLUMNS)}) values ({', '.join('?' * len(MIRROR_COLUMNS))})",
+                [
+                    tuple(json.dumps(row.get(c) or []) if c == "quality_flags" else row.get(c) for c in MIRROR_COLUMNS)
+                    for row in rows
+                ],
+            )
+
+    def _refresh_pending_saliency(self, supabase: Client, max_age=timedelta(days=1)):
+        """Re-pull recent rows whose saliency map was still being generated at the last sync"""
+        since = (datetime.now() - max_age).isoformat()
+        with self._connect() as conn:
+            ids = [row[0] for row in conn.execute(
+                "select id from screenings where saliency_url is null and created_at >= ? order by id desc limit 200", (since,)
+            )]
+        if ids:
+            rows = supabase.table("screenings").select(",".join(MIRROR_COLUMNS)).in_("id", ids).not_.is_("saliency_url", "null").execute().data
+            self._upsert(rows)
+
+    def sync(self, supabase: Client):
+        """Pull screenings newer than the last mirrored id and return how many were added"""
+        with self._sync_lock:
+            added = 0
+            for rows in iter_screening_pages(supabase, after_id=self.last_synced_id(), columns=MIRROR_COLUMNS):
+                self._upsert(rows)
+                added += len(rows)
+            self._refresh_pending_saliency(supabase)
+            self.last_sync = time.time()
+            return added
+
+    def sync_if_stale(self, supabase: Client, max_age=30):
+        """Sync unless another sync finished within max_age seconds; failures leave the local copy usable"""
+        if time.time() - self.last_sync < max_age:
+            return 0
+        try:
+            return self.sync(supabase)
+        except Exception as e:
+            logger.error(f"Error syncing screenings mirror: {e}", exc_info=True)
+            return 0
+
+    def _where(self, facility, start_date, end_date):
+        clauses, params = [], []
+        if facility:
+            clauses.append("facility = ?")
+            params.append(facility)
+        if start_date:
+            clauses.append("created_at >= ?")
+            params.append(start_date.isoformat())
+        if end_date:
+            clauses.append("created_at < ?")
+            params.append((end_date + timedelta(days=1)).isoformat())
+        return (" where " + " and ".join(clauses) if clauses else ""), params
+
+    def count(self, facility=None, start_date=None, end_date=None):
+        """Number of mirrored screenings matching the filters"""
+        where, params = self._where(facility, start_date, end_date)
+        with self._connect() as conn:
+            return conn.execute(f"select count(*) from screenings{where}", params).fetchone()[0]
+
+    def query(self, facility=None, start_date=None, end_date=None, order_by="created_at", descending=True, limit=1000, offset=0):
+        """Return one page of mirrored screenings matching the filters as dicts"""
+        if order_by not in SORTABLE_COLUMNS:
+            raise ValueError(f"Cannot sort by {order_by}")
+        where, params = self._where(facility, start_date, end_date)
+        sql = f"select * from screenings{where} order by {order_by} {'desc' if descending else 'asc'}, id desc limit ? offset ?"
+        with self._connect() as conn:
+            rows = conn.execute(sql, params + [limit, offset]).fetchall()
+        return [{**dict(row), "quality_flags": json.loads(row["quality_flags"] or "[]")} for row in rows]
+
+    def aggregate(self, facility=None, start_date=None, end_date=None):
+        """Count escalated screenings and average confidence by facility, diagnosis and week"""
+        where, params = self._where(facility, start_date, end_date)
+        sql = f"""
+            select facility, diagnosis,
+                   date(substr(created_at, 1, 10), 'weekday 0', '-6 days') as week,
+                   count(*) as escalated,
+                   avg(confidence_score) as mean_confidence
+            from screenings{where}
+            group by facility, diagnosis, week
+            order by week desc
+        """
+        with self._connect() as conn:
+            return [dict(row) for row in conn.execute(sql, params).fetchall()]
+
+    def facilities(self):
+        with self._connect() as conn:
+            return [row[0] for row in conn.execute("select distinct facility from screenings where facility is not null order by facility")]
+
+@st.cache_resource
+def get_mirror():
+    """Return the process-wide screenings mirror stored at MIRROR_DB_PATH"""
+    return ScreeningMirror(os.getenv("MIRROR_DB_PATH", "./data/screenings_mirror.sqlite"))
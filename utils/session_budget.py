@@ -0,0 +1,159 @@
+import logging
+import os
+import threading
+import time
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+logger = logging.getLogger(__name__)
+
+def current_session_id():
+    """Return the Streamlit session id of the running script, or None outside a session"""
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx else None
+
+def process_rss():
+    """Resident memory of this process in bytes, or None where /proc is unavailable"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+class SessionBudget:
+    """Accounts for screening artifacts held in session state across the process.
+
+    Pages register the artifacts they keep between reruns with track(). When
+    the tracked total goes over the budget, the oldest artifacts first drop
+    their decoded pixels, keeping the encoded bytes escalation needs. Then
+    artifacts of sessions idle for longer than idle_seconds are evicted
+    without waiting for the background reaper, which clears those sessions
+    anyway since abandoned tabs keep their session state alive. Sessions used
+    within idle_seconds are never evicted, so a clinician on the escalation
+    form keeps their image even if the budget stays exceeded.
+    """
+
+    def __init__(self, budget_bytes, idle_seconds, reap_interval=60):
+        self.budget_bytes = budget_bytes
+        self.idle_seconds = idle_seconds
+        self._lock = threading.Lock()
+        # session id -> {"last_seen": float, "artifacts": {key: (added, artifact)}}
+        self._sessions = {}
+        self.evictions = 0
+        self.releases = 0
+        self.reaped = 0
+        threading.Thread(target=self._reap_forever, args=(reap_interval,), name="session-reaper", daemon=True).start()
+
+    def _session(self, session_id):
+        return self._sessions.setdefault(session_id, {"last_seen": time.time(), "artifacts": {}})
+
+    def touch(self):
+        """Mark the current session as active"""
+        session_id = current_session_id()
+        if session_id:
+            with self._lock:
+                self._session(session_id)["last_seen"] = time.time()
+
+    def track(self, artifact, key="screening"):
+        """Register an artifact kept in the current session, replacing the one stored under key"""
+        session_id = current_session_id()
+        if not session_id:
+            return
+        with self._lock:
+            session = self._session(session_id)
+            session["last_seen"] = time.time()
+            session["artifacts"][key] = (time.time(), artifact)
+            self._enforce()
+
+    def forget(self, key="screening"):
+        """Stop tracking the current session's artifact under key"""
+        session_id = current_session_id()
+        if session_id:
+            with self._lock:
+                self._sessions.get(session_id, {}).get("artifacts", {}).pop(key, None)
+
+    def _total(self):
+        return sum(artifact.nbytes for session in self._sessions.values() for _, artifact in session["artifacts"].values())
+
+    def _enforce(self):
+        total = self._total()
+        if total <= self.budget_bytes:
+            return
+        oldest = sorted((
+            (added, session_id, key, artifact)
+            for session_id, session in self._sessions.items()
+            for key, (added, artifact) in session["artifacts"].items()
+        ), key=lambda entry: entry[0])
+        # drop decoded pixels everywhere before evicting anything
+        for _, _, _, artifact in oldest:
+            if total <= self.budget_bytes:
+                return
+            before = artifact.nbytes
+            artifact.release()
+            if artifact.nbytes < before:
+                self.releases += 1
+                total -= before - artifact.nbytes
+        cutoff = time.time() - self.idle_seconds
+        for _, session_id, key, artifact in oldest:
+            if total <= self.budget_bytes:
+                return
+            if self._sessions[session_id]["last_seen"] >= cutoff:
+                continue
+            total -= artifact.nbytes
+            artifact.evict()
+            del self._sessions[session_id]["artifacts"][key]
+            self.evictions += 1
+            logger.info(f"Evicted screening artifact {artifact.image_hash} from idle session {session_id} over the memory budget")
+
+    def reap(self):
+        """Evict the artifacts of sessions idle for longer than idle_seconds and forget those sessions"""
+        cutoff = time.time() - self.idle_seconds
+        with self._lock:
+            idle = [session_id for session_id, session in self._sessions.items() if session["last_seen"] < cutoff]
+            for session_id in idle:
+                for _, artifact in self._sessions.pop(session_id)["artifacts"].values():
+                    artifact.evict()
+                    self.evictions += 1
+            self.reaped += len(idle)
+        if idle:
+            logger.info(f"Reaped {len(idle)} idle sessions")
+        return len(idle)
+
+    def _reap_forever(self, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                self.reap()
+            except Exception as e:
+                logger.error(f"Error reaping idle sessions: {e}", exc_info=True)
+
+    def metrics(self):
+        """Process memory and the bytes each session holds in tracked artifacts"""
+        now = time.time()
+        with self._lock:
+            sessions = [
+                {
+                    "session": session_id[:8],
+                    "artifacts": len(session["artifacts"]),
+                    "bytes": sum(artifact.nbytes for _, artifact in session["artifacts"].values()),
+                    "idle_seconds": int(now - session["last_seen"]),
+                }
+                for session_id, session in self._sessions.items()
+            ]
+            return {
+                "rss": process_rss(),
+                "tracked": sum(session["bytes"] for session in sessions),
+                "budget": self.budget_bytes,
+                "evictions": self.evictions,
+                "releases": self.releases,
+                "reaped": self.reaped,
+                "sessions": sorted(sessions, key=lambda session: session["bytes"], reverse=True),
+            }
+
+@st.cache_resource
+def get_session_budget():
+    """Return the process-wide session budget configured by SESSION_MEMORY_BUDGET_MB and SESSION_IDLE_MINUTES"""
+    return SessionBudget(
+        int(float(os.getenv("SESSION_MEMORY_BUDGET_MB", 512)) * 1024 * 1024),
+        float(os.getenv("SESSION_IDLE_MINUTES", 30)) * 60,
+    )
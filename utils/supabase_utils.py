@@ -1,46 +1,86 @@
 from supabase import create_client, Client
 import os
+import hashlib
 from datetime import datetime
-from PIL import Image
+import logging
+from utils.tus_utils import upload_resumable
+
+logger = logging.getLogger(__name__)
 
 def init_supabase():
     supabase_url = os.getenv('SUPABASE_URL')
     supabase_key = os.getenv('SUPABASE_KEY')
     return create_client(supabase_url, supabase_key)
 
-def save_image_to_supabase(supabase: Client, file, client_code):
-    """Save the PIL image to Supabase storage and return the URL"""
-    temp_path = "temp_image.jpg"
-    image = Image.open(file).convert('RGB')
-    image.save(temp_path)
-    
-    bucket_name = "screening_images"
-    file_extension = file.name.split(".")[-1].lower()
-    file_path = f"{client_code}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{file_extension}"
-
-    mime_type_map = {
-        "jpg": "image/jpeg",
-        "jpeg": "image/jpeg",
-        "png": "image/png",
-    }
+BUCKET_NAME = "screening_images"
 
-    mime_type = mime_type_map.get(file_extension, "application/octet-stream")
-    
-    with open(temp_path, 'rb') as f:
-        supabase.storage.from_(bucket_name).upload(file_path, f, file_options={"content-type": mime_type})
-    
-    os.remove(temp_path)
-    
-    return supabase.storage.from_(bucket_name).get_public_url(file_path)
+MIME_TYPE_MAP = {
+    "jpg": "image/jpeg",
+    "jpeg": "image/jpeg",
+    "png": "image/png",
+}
 
-def save_screening_data(supabase: Client, image_url, class_name, conf_score, selected_facility, client_code):
-    """Save screening data to Supabase table"""
-    data = {
+def image_content_hash(data):
+    """Return the SHA-256 hex digest used as the storage key for image bytes"""
+    return hashlib.sha256(data).hexdigest()
+
+def image_exists(supabase: Client, file_path):
+    """Check whether an object is already stored in the screening image bucket"""
+    objects = supabase.storage.from_(BUCKET_NAME).list("", {"search": file_path})
+    return any(obj.get("name") == file_path for obj in objects)
+
+def image_storage_path(artifact):
+    """Return the content-addressed storage key for an artifact"""
+    return f"{artifact.image_hash}.{artifact.extension}"
+
+def image_public_url(supabase: Client, artifact):
+    """Return the public URL of an artifact's image, whether or not it is uploaded yet"""
+    return supabase.storage.from_(BUCKET_NAME).get_public_url(image_storage_path(artifact))
+
+def create_signed_image_url(supabase: Client, artifact, expires_in):
+    """Return a URL to an uploaded artifact's image that stops working after expires_in seconds"""
+    response = supabase.storage.from_(BUCKET_NAME).create_signed_url(image_storage_path(artifact), expires_in)
+    return response.get("signedURL") or response.get("signedUrl")
+
+def save_image_to_supabase(supabase: Client, artifact, progress=None):
+    """Save the uploaded image bytes under their content hash and return the URL and hash"""
+    file_path = image_storage_path(artifact)
+
+    if not image_exists(supabase, file_path):
+        upload_resumable(artifact.data, BUCKET_NAME, file_path, artifact.mime_type, progress)
+
+    return image_public_url(supabase, artifact), artifact.image_hash
+
+def screening_row(image_url, class_name, conf_score, selected_facility, client_code, image_hash=None, quality_flags=None):
+    """Build a screenings table row"""
+    return {
         "image_url": image_url,
+        "image_hash": image_hash,
+        "quality_flags": quality_flags or [],
         "diagnosis": class_name,
         "confidence_score": conf_score,
         "facility": selected_facility,
         "client_code": client_code,
         "created_at": datetime.now().isoformat()
     }
-    supabase.table("screenings").insert(data).execute()
\ No newline at end of file
+
+def save_screening_data(supabase: Client, image_url, class_name, conf_score, selected_facility, client_code, image_hash=None, quality_flags=None):
+    """Save screening data to Supabase table"""
+    data = screening_row(image_url, class_name, conf_score, selected_facility, client_code, image_hash, quality_flags)
+    supabase.table("screenings").insert(data).execute()
+
+def record_screening(supabase: Client, selected_facility, class_name):
+    """Count a screened image in the per-facility summary table"""
+    try:
+        supabase.rpc("record_screening", {"p_facility": selected_facility, "p_diagnosis": class_name}).execute()
+    except Exception as e:
+        logger.error(f"Error recording screening stats: {e}", exc_info=True)
+
+def fetch_screening_stats(supabase: Client, facility=None, since=None):
+    """Fetch aggregated screening counts by facility, diagnosis and week"""
+    query = supabase.table("screening_stats").select("facility, diagnosis, week, screened, escalated")
+    if facility:
+        query = query.eq("facility", facility)
+    if since:
+        query = query.gte("week", since.isoformat())
+    return query.order("week", desc=True).execute().data
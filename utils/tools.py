@@ -1,7 +1,13 @@
 import base64
+import os
+import threading
+import time
 import streamlit as st
+from PIL import ImageOps
+from utils.inference_gate import configure_torch_threads, get_gate
 
-
+_stats_lock = threading.Lock()
+_view_latency_ms = None
 
 def set_background(image_file):
     with open(image_file, "rb") as f:
@@ -18,16 +24,86 @@ def set_background(image_file):
     st.markdown(style, unsafe_allow_html=True)
 
 
-def classify(image, model):
-    # make prediction
-    prediction = model.predict(image, save=True, show_labels=True, imgsz=640, conf=0.8)
-    result = prediction[0]
+def load_yolo(model_path="./model/best.pt", configure_threads=True):
+    """Load the YOLO classifier onto the GPU when available.
+
+    By default torch's threads are split between the serving inference slots;
+    offline tools pass configure_threads=False and set their own.
+    """
+    import torch
+    from ultralytics import YOLO
+
+    if configure_threads:
+        configure_torch_threads()
+    model = YOLO(model_path)
+    model.to(torch.device('cuda' if torch.cuda.is_available() else 'cpu'))
+    return model
+
+def tta_views(image):
+    """Return the augmented views of an image used for test-time augmentation"""
+    width, height = image.size
+    crop = image.crop((int(width * 0.05), int(height * 0.05), int(width * 0.95), int(height * 0.95)))
+    return [image, ImageOps.mirror(image), ImageOps.flip(image), crop, ImageOps.mirror(crop)]
+
+def _record_latency(elapsed_ms, n_views):
+    """Update the moving average of forward-pass latency per view"""
+    global _view_latency_ms
+    per_view = elapsed_ms / n_views
+    with _stats_lock:
+        _view_latency_ms = per_view if _view_latency_ms is None else 0.8 * _view_latency_ms + 0.2 * per_view
+
+def _tta_allowed(n_views):
+    """Allow TTA only when it fits the latency budget and the model isn't under load"""
+    budget_ms = float(os.getenv("TTA_BUDGET_MS", 1500))
+    # the caller holds one slot; any other busy slot or queued request counts as load
+    stats = get_gate().stats()
+    if stats["waiting"] or stats["active"] > 1:
+        return False
+    with _stats_lock:
+        return _view_latency_ms is None or _view_latency_ms * n_views <= budget_ms
+
+def predict_class(image, model, tta=False, save=True, record_latency=True):
+    """Run the forward pass for one image and return the class name and confidence score.
+
+    Pass record_latency=False for runs that aren't the live model, such as
+    shadow evaluations, so they don't skew the TTA latency budget.
+    """
+    views = tta_views(image) if tta else [image]
+    if len(views) > 1 and not _tta_allowed(len(views)):
+        views = [image]
+
+    start = time.perf_counter()
+    if len(views) > 1:
+        # one batched forward pass over all views, averaging the class probabilities
+        prediction = model.predict(views, save=False, imgsz=640, verbose=False)
+        probs = sum(result.probs.data for result in prediction) / len(prediction)
+        pred_class_idx = int(probs.argmax())
+        confidence_score = probs[pred_class_idx].item()
+    else:
+        # make prediction
+        prediction = model.predict(image, save=save, show_labels=True, imgsz=640, conf=0.8)
+        result = prediction[0]
+
+        # get class index and confidence score
+        pred_class_idx = result.probs.top1
+        confidence_score = result.probs.top1conf.item()
+    if record_latency:
+        _record_latency((time.perf_counter() - start) * 1000, len(views))
 
     # get class name
-    pred_class_idx = result.probs.top1
     pred_class_name = model.names[pred_class_idx]
 
-    # get confidence score
-    confidence_score = result.probs.top1conf.item()
-
     return pred_class_name, confidence_score
+
+def classify(image, model, tta=None, on_wait=None):
+    """Classify an image, queueing behind the inference gate when all slots are busy.
+
+    on_wait(position) is called while the request waits for a slot; raises
+    InferenceBusyError when the wait exceeds INFERENCE_MAX_WAIT.
+    """
+    if tta is None:
+        tta = os.getenv("TTA_ENABLED", "false").lower() == "true"
+
+    # TTA is decided once a slot is held, so requests queued behind us get a single pass
+    with get_gate().slot(on_wait):
+        return predict_class(image, model, tta)
@@ -0,0 +1,139 @@
+import base64
+import json
+import logging
+import os
+import threading
+import time
+from urllib.parse import urljoin
+import httpx
+
+logger = logging.getLogger(__name__)
+
+TUS_VERSION = "1.0.0"
+# Supabase storage requires 6MB chunks for every chunk except the last one,
+# so most screening images are sent in one chunk and can't resume part-way
+DEFAULT_CHUNK_SIZE = 6 * 1024 * 1024
+
+_state_lock = threading.Lock()
+
+def tus_endpoint():
+    """Return the TUS endpoint, overridable with TUS_ENDPOINT for a local stand-in server"""
+    endpoint = os.getenv("TUS_ENDPOINT")
+    if endpoint:
+        return endpoint
+    return f"{os.getenv('SUPABASE_URL').rstrip('/')}/storage/v1/upload/resumable"
+
+def _auth_headers():
+    key = os.getenv("SUPABASE_KEY")
+    return {
+        "Tus-Resumable": TUS_VERSION,
+        "authorization": f"Bearer {key}",
+        "apikey": key,
+        "x-upsert": "true",
+    }
+
+def _state_path():
+    return os.getenv("UPLOAD_STATE_PATH", "./data/uploads.json")
+
+def _load_state():
+    try:
+        with open(_state_path()) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def _update_state(key, upload_url):
+    """Persist (or clear, when upload_url is None) the upload URL for an object"""
+    with _state_lock:
+        state = _load_state()
+        if upload_url is None:
+            state.pop(key, None)
+        else:
+            state[key] = upload_url
+        state_path = _state_path()
+        os.makedirs(os.path.dirname(state_path) or ".", exist_ok=True)
+        temp_path = f"{state_path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(temp_path, state_path)
+
+def _encode_metadata(metadata):
+    return ",".join(f"{k} {base64.b64encode(v.encode()).decode()}" for k, v in metadata.items())
+
+def _create_upload(client, size, bucket_name, object_name, content_type):
+    endpoint = tus_endpoint()
+    response = client.post(endpoint, headers={
+        **_auth_headers(),
+        "Upload-Length": str(size),
+        "Upload-Metadata": _encode_metadata({
+            "bucketName": bucket_name,
+            "objectName": object_name,
+            "contentType": content_type,
+        }),
+    })
+    response.raise_for_status()
+    return urljoin(endpoint, response.headers["Location"])
+
+def _server_offset(client, upload_url):
+    """Return the offset the server has for an upload, or None if it no longer exists"""
+    response = client.head(upload_url, headers=_auth_headers())
+    if response.status_code in (403, 404, 410):
+        return None
+    response.raise_for_status()
+    return int(response.headers["Upload-Offset"])
+
+def upload_resumable(data, bucket_name, object_name, content_type, progress=None):
+    """Upload bytes in chunks over TUS, resuming any earlier attempt for the same object.
+
+    The upload URL is persisted under UPLOAD_STATE_PATH so a transfer interrupted by a
+    dropped connection or an app restart continues from the server's offset.
+    progress, if given, is called with (bytes_sent, total_bytes).
+
+    The server only keeps whole chunks, and Supabase requires 6MB ones, so an
+    image under 6MB (most cervigrams) goes up in a single PATCH. A drop late in
+    that PATCH restarts it from zero. Resuming mid-image only helps larger
+    uploads, or a stand-in server run with a smaller TUS_CHUNK_SIZE.
+    """
+    key = f"{bucket_name}/{object_name}"
+    size = len(data)
+    chunk_size = int(os.getenv("TUS_CHUNK_SIZE", DEFAULT_CHUNK_SIZE))
+    max_retries = int(os.getenv("TUS_MAX_RETRIES", 5))
+    failures = 0
+
+    with httpx.Client(timeout=60) as client:
+        upload_url = _load_state().get(key)
+        offset = None
+        while True:
+            try:
+                if upload_url:
+                    offset = _server_offset(client, upload_url)
+                if offset is None:
+                    upload_url = _create_upload(client, size, bucket_name, object_name, content_type)
+                    _update_state(key, upload_url)
+                    offset = 0
+
+                while offset < size:
+                    if progress:
+                        progress(offset, size)
+                    chunk = data[offset:offset + chunk_size]
+                    response = client.patch(upload_url, content=chunk, headers={
+                        **_auth_headers(),
+                        "Upload-Offset": str(offset),
+                        "Content-Type": "application/offset+octet-stream",
+                    })
+                    response.raise_for_status()
+                    offset = int(response.headers["Upload-Offset"])
+                    failures = 0
+                break
+            except (httpx.TransportError, httpx.HTTPStatusError) as e:
+                if isinstance(e, httpx.HTTPStatusError) and e.response.status_code < 500 and e.response.status_code != 409:
+                    raise
+                failures += 1
+                if failures > max_retries:
+                    raise
+                logger.warning(f"Resumable upload of {key} interrupted at {offset}/{size} bytes, retrying: {e}")
+                time.sleep(min(2 ** failures, 30))
+
+    _update_state(key, None)
+    if progress:
+        progress(size, size)